@@ -0,0 +1,153 @@
+"""
+merge the workers' shards into the datasets the search engines read
+
+every worker of run_all_instances.sh exports {nyse,nasdaq}_exported_table_equity_<i>.csv, the
+crypto job crypto_info_table.csv. this stage finds the shards of all TOTAL_WORKERS workers,
+streams them chunk by chunk into one csv per exchange (memory is a chunk plus the set of seen
+tickers, not the table), renames the columns to the engines' schema (symbol -> Symbol in the
+header only), drops repeated tickers and writes the .npz search artifact of every merged csv.
+
+everything is written to a staging directory first and only moved into place once all outputs
+are complete; a missing shard or a failed write leaves the previous datasets untouched
+
+    python3 merge_shards.py
+    python3 merge_shards.py -data_dir ../data -out_dir ../data -workers 12 -remove_shards
+"""
+import os
+import sys
+import glob
+import shutil
+import argparse
+import pandas as pd
+from dotenv import load_dotenv
+
+# The search artifact format and its columns are owned by the search engines (search/dataset_loader.py, search/compile_index.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from search.dataset_loader import read_table, write_artifact, ARTIFACT_SUFFIX
+from search.compile_index import search_columns
+
+root_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+""" equity column renames of the worker exports, applied to the header only """
+equity_renames = {"symbol": "Symbol", "name": "Name"}
+
+""" merged dataset -> (shard file pattern, column identifying a row, header renames, search engine) """
+merged_tables = {
+    "equity_nyse_exported_table.csv": ("nyse_exported_table_equity_{}.csv", "Symbol", equity_renames, "equity"),
+    "equity_nasdaq_exported_table.csv": ("nasdaq_exported_table_equity_{}.csv", "Symbol", equity_renames, "equity"),
+    "crypto_info_table_full.csv": ("crypto_info_table.csv", "id", {}, "crypto"),
+    }
+
+
+class MergeError(Exception):
+    pass
+
+
+def find_shards(data_dir, pattern, workers=None):
+    """ the shard paths in worker order. workers: the expected number of shards (every one of
+        0..workers-1 must exist), None to take the shards found, which must be numbered 0..n-1 """
+    if "{}" not in pattern:
+        path = os.path.join(data_dir, pattern)
+        if not os.path.exists(path):
+            raise MergeError(f"missing {path}")
+        return [path]
+    if workers is None:
+        prefix, suffix = pattern.split("{}")
+        found = glob.glob(os.path.join(data_dir, pattern.format("*")))
+        indices = sorted(int(name[len(prefix):-len(suffix)]) for name in map(os.path.basename, found)
+                         if name[len(prefix):-len(suffix)].isdigit())
+        if not indices:
+            raise MergeError(f"no shards {pattern.format('*')} in {data_dir}")
+        workers = indices[-1] + 1
+    paths = [os.path.join(data_dir, pattern.format(i)) for i in range(workers)]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise MergeError(f"{len(missing)} of {workers} shards missing: {missing}")
+    return paths
+
+
+def merge_csvs(paths, out_path, key, renames=None, chunksize=2000):
+    """ stream the csvs into out_path: header of the first shard (renamed), later shards aligned
+        to it, rows whose key is empty or already written dropped. values are copied as text.
+        returns the row counts """
+    counts = {"shards": len(paths), "read": 0, "duplicates": 0, "no_key": 0, "written": 0}
+    seen = set()
+    columns = None
+    with open(out_path, "w", newline="") as out:
+        for path in paths:
+            try:
+                chunks = pd.read_csv(path, dtype=str, na_filter=False, chunksize=chunksize)
+            except pd.errors.EmptyDataError:
+                raise MergeError(f"{path} is empty")
+            for chunk in chunks:
+                chunk = chunk.rename(columns=renames or {})
+                chunk = chunk.drop(columns=[col for col in chunk.columns if col.startswith("Unnamed:")])
+                if columns is None:
+                    columns = list(chunk.columns)
+                    if key not in columns:
+                        raise MergeError(f"{path} has no {key} column")
+                chunk = chunk.reindex(columns=columns, fill_value="")
+                counts["read"] += len(chunk)
+                keys = chunk[key]
+                has_key = keys.str.strip() != ""
+                first = ~keys.duplicated() & ~keys.isin(seen)
+                counts["no_key"] += int((~has_key).sum())
+                counts["duplicates"] += int((has_key & ~first).sum())
+                chunk = chunk[has_key & first]
+                seen.update(chunk[key])
+                chunk.index = range(counts["written"], counts["written"] + len(chunk))
+                chunk.to_csv(out, header=out.tell() == 0)
+                counts["written"] += len(chunk)
+    return counts
+
+
+def merge_shards(data_dir, out_dir, workers=None, chunksize=2000, remove_shards=False):
+    """ merge every table of merged_tables and move them into out_dir together.
+        returns merged file name -> row counts """
+    os.makedirs(out_dir, exist_ok=True)
+    staging_dir = os.path.join(out_dir, ".merge_staging")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    report, outputs, inputs = {}, [], []
+    try:
+        for name, (pattern, key, renames, engine) in merged_tables.items():
+            paths = find_shards(data_dir, pattern, workers)
+            staged = os.path.join(staging_dir, name)
+            report[name] = merge_csvs(paths, staged, key, renames, chunksize)
+            """ the artifact from the merged csv, so it holds exactly what the csv path reads """
+            text_columns, numeric_columns = search_columns(engine)
+            staged_artifact = os.path.splitext(staged)[0] + ARTIFACT_SUFFIX
+            write_artifact(staged_artifact, read_table(staged, text_columns, numeric_columns), text_columns, numeric_columns)
+            outputs += [staged, staged_artifact]
+            inputs += paths
+            print(f"{name}: {report[name]}")
+        for staged in outputs:
+            os.replace(staged, os.path.join(out_dir, os.path.basename(staged)))
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    if remove_shards:
+        for path in inputs:
+            os.remove(path)
+    return report
+
+
+if __name__ == '__main__':
+    load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '.env'))
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-data_dir', default=root_data_dir, help='directory with the workers\' exports')
+    parser.add_argument('-out_dir', default=None, help='directory of the merged datasets (default: data_dir)')
+    parser.add_argument('-workers', type=int, default=None,
+                        help='shards expected per exchange (default: TOTAL_WORKERS, else every shard found)')
+    parser.add_argument('-chunksize', type=int, default=2000, help='rows read at a time')
+    parser.add_argument('-remove_shards', action='store_true', help='delete the shards once merged')
+    args = parser.parse_args()
+    workers = args.workers
+    if workers is None and os.getenv('TOTAL_WORKERS'):
+        workers = int(os.getenv('TOTAL_WORKERS'))
+
+    try:
+        report = merge_shards(args.data_dir, args.out_dir or args.data_dir, workers, args.chunksize, args.remove_shards)
+    except MergeError as e:
+        print(f"merge failed, datasets left unchanged: {e}")
+        sys.exit(1)
+    print(f"merged {sum(counts['written'] for counts in report.values())} rows")
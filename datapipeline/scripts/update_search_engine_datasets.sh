@@ -7,48 +7,14 @@ PATH=/home/ubuntu/angle_backend/.local/bin:/usr/local/sbin:/usr/local/bin:/usr/s
 # aws s3 cp s3://illumenti-backend-datapipeline/datapipeline/output/ /home/ubuntu/angle_backend/data/ --recursive --include "*_equity_*csv"
 # aws s3 cp s3://illumenti-backend-datapipeline/datapipeline/output/crypto_info_table.csv /home/ubuntu/angle_backend/data/
 
-head -1 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_0.csv > /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-head -1 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_0.csv > /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-sed -i 's/symbol/Symbol/g' /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-sed -i 's/name/Name/g' /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-sed -i 's/symbol/Symbol/g' /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-sed -i 's/name/Name/g' /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_0.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_0.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_1.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_1.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_2.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_2.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_3.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_3.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_4.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_4.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_5.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_5.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_6.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_6.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_7.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_7.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_8.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_8.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_9.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_9.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_10.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_10.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_11.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_11.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_12.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_12.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_13.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_13.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nyse_exported_table_equity_14.csv >> /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv
-tail +2 /home/ubuntu/angle_backend/data/nasdaq_exported_table_equity_14.csv >> /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv
-
-cp /home/ubuntu/angle_backend/data/out/equity_nyse_exported_table.csv /home/ubuntu/angle_backend/backend/data/
-cp /home/ubuntu/angle_backend/data/out/equity_nasdaq_exported_table.csv /home/ubuntu/angle_backend/backend/data/
-cp /home/ubuntu/angle_backend/data/crypto_info_table.csv /home/ubuntu/angle_backend/backend/data/crypto_info_table_full.csv
-
-rm /home/ubuntu/angle_backend/data/*csv
+# merge the workers' shards (all TOTAL_WORKERS of them, see datapipeline/merge_shards.py) into the csvs and
+# .npz search artifacts the web app reads; they are only replaced once every output is complete, and the
+# shards are deleted after a successful merge. a missing shard keeps the current datasets
+export $(cat /home/ubuntu/angle_backend/.env | xargs)
+python3 /home/ubuntu/angle_backend/backend/datapipeline/merge_shards.py \
+    -data_dir /home/ubuntu/angle_backend/data \
+    -out_dir /home/ubuntu/angle_backend/backend/data \
+    -remove_shards || exit 1
 
 # cd /home/ubuntu/angle_backend/illumenti
 # docker-compose up -d --build >> /var/log/illumenti/aws_script.log 2>&1
@@ -59,6 +25,3 @@ sleep 5
 
 # date >> /var/log/illumenti/aws_script.log 2>&1
 # echo '--------------------------------------------' >> /var/log/illumenti/aws_script.log 2>&1
-
-
-
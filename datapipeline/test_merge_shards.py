@@ -0,0 +1,51 @@
+import os
+import pytest
+import pandas as pd
+from merge_shards import merge_shards, find_shards, MergeError
+from search.dataset_loader import read_artifact
+
+def write_shards(data_dir, workers=3):
+    for i in range(workers):
+        """ worker 1 repeats a ticker of worker 0, worker 2 exports the old lowercase header """
+        symbols = [f"T{i}A", f"T{i}B"] + (["T0A"] if i == 1 else [])
+        header = "symbol,name" if i == 2 else "Symbol,Name"
+        rows = "".join(f"{n},{s},{s} Inc,N/A,__nan__\n" for n, s in enumerate(symbols))
+        for exchange in ("nyse", "nasdaq"):
+            (data_dir / f"{exchange}_exported_table_equity_{i}.csv").write_text(
+                f",{header},description__profile,pe__quote\n" + rows)
+    (data_dir / "crypto_info_table.csv").write_text(
+        ",id,name,symbol,description,market_cap\n0,1,Bitcoin,BTC,coin,1e12\n1,2,Other,BTC,coin,5\n2,1,Bitcoin,BTC,coin,1e12\n")
+
+def test_merge(tmp_path):
+    write_shards(tmp_path)
+    out_dir = tmp_path / "out"
+    report = merge_shards(str(tmp_path), str(out_dir), workers=3, chunksize=1)
+    assert report["equity_nyse_exported_table.csv"] == {"shards": 3, "read": 7, "duplicates": 1, "no_key": 0, "written": 6}
+    """ crypto rows are told apart by id, two coins may share a symbol """
+    assert report["crypto_info_table_full.csv"]["written"] == 2
+    merged = pd.read_csv(out_dir / "equity_nyse_exported_table.csv", dtype=str, keep_default_na=False, index_col=0)
+    assert list(merged.columns) == ["Symbol", "Name", "description__profile", "pe__quote"]
+    assert merged["Symbol"].tolist() == ["T0A", "T0B", "T1A", "T1B", "T2A", "T2B"]
+    assert merged.index.tolist() == list(range(6)) and merged["description__profile"][0] == "N/A"
+    artifact = read_artifact(str(out_dir / "equity_nyse_exported_table.npz"))
+    assert artifact["Symbol"].tolist() == merged["Symbol"].tolist() and artifact["pe__quote"].isna().all()
+    assert sorted(os.listdir(out_dir)) == sorted(name + ext for name in ("equity_nyse_exported_table", "equity_nasdaq_exported_table",
+                                                                          "crypto_info_table_full") for ext in (".csv", ".npz"))
+
+def test_missing_shard_leaves_datasets(tmp_path):
+    write_shards(tmp_path)
+    out_dir = tmp_path / "out"
+    merge_shards(str(tmp_path), str(out_dir), workers=3)
+    before = (out_dir / "equity_nyse_exported_table.csv").read_text()
+    with pytest.raises(MergeError):
+        merge_shards(str(tmp_path), str(out_dir), workers=4)
+    assert (out_dir / "equity_nyse_exported_table.csv").read_text() == before
+    assert not (out_dir / ".merge_staging").exists()
+
+def test_find_shards(tmp_path):
+    write_shards(tmp_path, workers=12)
+    paths = find_shards(str(tmp_path), "nyse_exported_table_equity_{}.csv")
+    assert [os.path.basename(p) for p in paths][-3:] == [f"nyse_exported_table_equity_{i}.csv" for i in (9, 10, 11)]
+    os.remove(tmp_path / "nyse_exported_table_equity_5.csv")
+    with pytest.raises(MergeError):
+        find_shards(str(tmp_path), "nyse_exported_table_equity_{}.csv")
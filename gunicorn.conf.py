@@ -0,0 +1,29 @@
+"""
+Gunicorn configuration.
+
+SEARCH_PRELOAD=1 loads the app once in the master (preload_app), so the search
+indexes are built a single time and inherited copy-on-write by every worker.
+Each worker logs its memory usage after start-up; compare `shared_*` against
+`private_*` to check that the index pages are actually shared.
+With SEARCH_RELOAD_INTERVAL set, every worker watches the datasets and reloads
+its indexes on change (see web/extensions.py).
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+preload_app = os.environ.get('SEARCH_PRELOAD', '0') == '1'
+
+
+def when_ready(server):
+    from web.utils.memory import process_memory
+    server.log.info("Master pid %s memory (kB): %s", os.getpid(), process_memory())
+
+
+def post_worker_init(worker):
+    from web.utils.memory import process_memory
+    worker.log.info("Worker pid %s memory (kB): %s", worker.pid, process_memory())
+    if preload_app:
+        from web.extensions import start_search_reload_watcher
+        start_search_reload_watcher()
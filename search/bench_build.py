@@ -0,0 +1,71 @@
+"""
+index build benchmark: build time against the number of worker processes
+
+the universe is scaled up by repeating the exported rows (-scale), every build
+starts from a cold stem memo so the serial and parallel runs do the same work
+
+    python search/bench_build.py
+    python search/bench_build.py -engine crypto -scale 8 -workers 1,2,4,8
+"""
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+import pandas as pd
+try:
+    from .illumenti_search import IllumentiSearch
+    from .illumenti_crypto_search import IllumentiCryptoSearch
+    from .compile_index import equity_sources, crypto_sources, default_data_dir
+except ImportError:
+    from illumenti_search import IllumentiSearch
+    from illumenti_crypto_search import IllumentiCryptoSearch
+    from compile_index import equity_sources, crypto_sources, default_data_dir
+
+
+def load_engine(engine, data_dir, scale):
+    if engine == 'equity':
+        search = IllumentiSearch()
+        search.load_dataset(*equity_sources(data_dir))
+    else:
+        search = IllumentiCryptoSearch()
+        search.load_dataset(*crypto_sources(data_dir))
+    if scale > 1:
+        search.dataset = pd.concat([search.dataset] * scale, ignore_index=True)
+    return search
+
+
+def bench(search, workers):
+    search.normalizer.normalize.cache_clear()
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        search.build_index(workers=workers)
+    return time.time() - start
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-data_dir', default=default_data_dir, help='directory with the exported csv tables')
+    parser.add_argument('-engine', default='equity', choices=['equity', 'crypto'])
+    parser.add_argument('-scale', type=int, default=4, help='repeat the dataset rows this many times')
+    parser.add_argument('-workers', default=None, help='comma separated worker counts (default: 1,2,4,.. up to the cpu count)')
+    args = parser.parse_args()
+
+    if args.workers:
+        worker_counts = [int(w) for w in args.workers.split(',')]
+    else:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        search = load_engine(args.engine, args.data_dir, args.scale)
+    print(f"{args.engine}: {len(search.dataset)} rows, {os.cpu_count()} cpus")
+    print("workers  seconds  speedup")
+    base = None
+    for workers in worker_counts:
+        seconds = bench(search, workers)
+        base = base or seconds
+        print(f"{workers:7d}  {seconds:7.2f}  {base / seconds:6.2f}x")
+    sys.stdout.flush()
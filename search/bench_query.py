@@ -0,0 +1,117 @@
+"""
+query latency benchmark: per query time of the query path (query and plan caches off) and
+the per result column lookups, pandas DataFrame against the column store
+
+every query is timed twice: on the column store, and with the store swapped for a DataFrame
+of the same columns, so result assembly and the filters read pandas Series as the query path
+did before column_store.py. the lookup part reads, for every doc of a page, the columns result
+assembly reads (symbol, name, a numeric field) once through pandas Series indexing and once
+through the store
+
+    python search/bench_query.py -index_dir /tmp/index
+    python search/bench_query.py -engine crypto -limit 200 -repeat 50
+"""
+import io
+import sys
+import time
+import argparse
+import contextlib
+import statistics
+import numpy as np
+import pandas as pd
+try:
+    from .eval_ranking import load_engine
+    from .compile_index import default_data_dir
+    from .query_cache import QueryCache
+except ImportError:
+    from eval_ranking import load_engine
+    from compile_index import default_data_dir
+    from query_cache import QueryCache
+
+queries = {
+    "equity": ["tech", "software", "AAPL", "best tech companies", "gpu with high market cap",
+               "show me internet companies in california", "oil companies ranked by market cap",
+               "bank with high pe and low debt ratio", "show me food companies with debt ratio below 0.5"],
+    "crypto": ["bitcoin", "BTC", "NFT tokens", "cloud computing coins with high market cap",
+               "ethereum coins with market cap above 10 million", "ethereum coins launched in 2017"],
+    }
+
+
+def bench_queries(search, engine_queries, limit, repeat, stores):
+    """ store name -> query -> milliseconds of every run. the stores take turns every round, after
+        one untimed round, so warm-up and drift do not favor either """
+    times = {name: {query: [] for query in engine_queries} for name in stores}
+    for round_ in range(repeat + 1):
+        for name, store in stores.items():
+            search.store = store
+            for query in engine_queries:
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    search.query_page(query, limit=limit)
+                if round_:
+                    times[name][query].append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def dataframe_store(store):
+    """ the store's columns as a DataFrame, a drop-in for the store that is read through pandas """
+    return pd.DataFrame(store.columns)
+
+
+def summary(times):
+    """ mean, p50, p95 of all runs of all queries """
+    runs = [t for query_times in times.values() for t in query_times]
+    return statistics.mean(runs), statistics.median(runs), np.percentile(runs, 95)
+
+
+def bench_lookups(columns, rows, repeat):
+    """ microseconds per row for reading one value of every column, columns: name -> indexable """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for i in rows:
+            for column in columns:
+                column[i]
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(rows))
+
+
+def lookup_columns(search):
+    return [search.snapshot_text_columns[0], search.snapshot_text_columns[1],
+            next(iter(search.numeric_filter.columns))]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-engine', default='both', choices=['equity', 'crypto', 'both'])
+    parser.add_argument('-limit', type=int, default=10, help='page size')
+    parser.add_argument('-repeat', type=int, default=20, help='runs of every query')
+    parser.add_argument('-data_dir', default=default_data_dir, help='directory with the exported csv tables')
+    parser.add_argument('-index_dir', default=None, help='load snapshots from here instead of building from the csvs')
+    args = parser.parse_args()
+
+    engines = ['equity', 'crypto'] if args.engine == 'both' else [args.engine]
+    for engine in engines:
+        with contextlib.redirect_stdout(io.StringIO()):
+            search = load_engine(engine, args.data_dir, args.index_dir)
+        search.grammar.plans = QueryCache(maxsize=0)
+        store = search.store
+        stores = {"dataframe": dataframe_store(store), "store": store}
+        times = bench_queries(search, queries[engine], args.limit, args.repeat, stores)
+        search.store = store
+        print(f"{engine}: {len(search.store)} rows, limit {args.limit}, p50 ms per query")
+        width = max(map(len, queries[engine]))
+        print(f"  {'query':<{width}}  dataframe     store")
+        for query in queries[engine]:
+            print(f"  {query:<{width}}  {statistics.median(times['dataframe'][query]):9.2f}"
+                  f" {statistics.median(times['store'][query]):9.2f}")
+        for name, store_times in times.items():
+            mean, p50, p95 = summary(store_times)
+            print(f"  {name:<9} mean {mean:.2f} ms  p50 {p50:.2f} ms  p95 {p95:.2f} ms")
+
+        names = lookup_columns(search)
+        rows = np.random.default_rng(0).integers(0, len(search.store), size=1000).tolist()
+        frame = pd.DataFrame({name: search.store[name] for name in names})
+        pandas_us = bench_lookups([frame[name] for name in names], rows, args.repeat)
+        store_us = bench_lookups([search.store[name] for name in names], rows, args.repeat)
+        print(f"  lookups of {len(names)} columns per row: pandas {pandas_us:.2f} us  store {store_us:.2f} us"
+              f"  ({pandas_us / store_us:.0f}x)")
+    sys.stdout.flush()
@@ -0,0 +1,43 @@
+"""
+struct of arrays the engines' query path reads instead of the pandas DataFrame
+
+pandas loads and cleans the exported tables only. once an index is built (or a snapshot
+loaded) every column a query reads is a plain array: numeric fields as float64 numpy arrays
+(shared with the numeric filter) and text columns as numpy object arrays of interned strings
+(the location / leadership filters read token postings, see token_postings.py). a scalar
+lookup is an array index, not a pandas Series __getitem__
+"""
+import sys
+import numpy as np
+
+
+def intern_strings(values):
+    """ numpy object array of interned str, repeated values (names, years) share one object """
+    return np.array([sys.intern(str(v)) for v in values], dtype=object)
+
+
+class ColumnStore:
+    def __init__(self, columns):
+        self.columns = dict(columns)
+        self.n_rows = len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @classmethod
+    def build(cls, text, numeric):
+        """ text: column -> strings, numeric: field -> float64 array """
+        columns = {col: intern_strings(values) for col, values in text.items()}
+        columns.update(numeric)
+        return cls(columns)
+
+    @classmethod
+    def from_dataset(cls, dataset, text_columns, numeric):
+        """ the columns of a loaded DataFrame the query path reads """
+        return cls.build({col: dataset[col] for col in text_columns}, numeric)
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __len__(self):
+        return self.n_rows
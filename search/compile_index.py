@@ -0,0 +1,92 @@
+"""
+offline "compile index" step: load the exported csv's (the pipeline's .npz search artifacts
+when present), tokenize and build both search engines once and write their snapshots, the
+web app then memory-maps them at startup.
+an existing snapshot is used as the previous build: only rows whose text changed are
+tokenized again (-full rebuilds everything)
+
+    python search/compile_index.py
+    python search/compile_index.py -data_dir ./data -out_dir ./data/index
+    python search/compile_index.py -full -workers 0
+"""
+import os
+import time
+import argparse
+try:
+    from .illumenti_search import IllumentiSearch
+    from .illumenti_crypto_search import IllumentiCryptoSearch
+    from .index_snapshot import SnapshotError
+    from .dataset_loader import search_source
+except ImportError:
+    from illumenti_search import IllumentiSearch
+    from illumenti_crypto_search import IllumentiCryptoSearch
+    from index_snapshot import SnapshotError
+    from dataset_loader import search_source
+
+default_data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+""" engine name -> class, the engines the exported tables are compiled for """
+engine_classes = {engine.engine_name: engine for engine in (IllumentiSearch, IllumentiCryptoSearch)}
+
+
+def search_columns(engine_name):
+    """ (text columns, numeric columns) the engine reads, what the pipeline keeps in its search artifacts """
+    return engine_classes[engine_name]().search_columns()
+
+
+def equity_sources(data_dir):
+    return [search_source(os.path.join(data_dir, 'equity_nyse_exported_table.csv')),
+            search_source(os.path.join(data_dir, 'equity_nasdaq_exported_table.csv'))]
+
+
+def crypto_sources(data_dir):
+    return [search_source(os.path.join(data_dir, 'crypto_info_table_full.csv'))]
+
+
+def previous_build(engine_class, path):
+    """ the engine of the last compile, or None when there is no readable snapshot """
+    previous = engine_class()
+    try:
+        previous.load_snapshot(path)
+    except (SnapshotError, OSError) as e:
+        print(f"no previous build at {path} ({e}), full build")
+        return None
+    return previous
+
+
+def compile_equity(data_dir, out_dir, full=False, workers=None):
+    sources = equity_sources(data_dir)
+    path = os.path.join(out_dir, 'equity')
+    previous = None if full else previous_build(IllumentiSearch, path)
+    iSearch = IllumentiSearch()
+    iSearch.load_dataset(*sources)
+    iSearch.build_index(previous=previous, workers=workers)
+    iSearch.save_snapshot(path, sources)
+
+
+def compile_crypto(data_dir, out_dir, full=False, workers=None):
+    sources = crypto_sources(data_dir)
+    path = os.path.join(out_dir, 'crypto')
+    previous = None if full else previous_build(IllumentiCryptoSearch, path)
+    iCryptoSearch = IllumentiCryptoSearch()
+    iCryptoSearch.load_dataset(*sources)
+    iCryptoSearch.build_index(previous=previous, workers=workers)
+    iCryptoSearch.save_snapshot(path, sources)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-data_dir', default=default_data_dir, help='directory with the exported csv tables')
+    parser.add_argument('-out_dir', default=None, help='snapshot directory (default: <data_dir>/index)')
+    parser.add_argument('-engine', default='all', choices=['all'] + list(engine_classes))
+    parser.add_argument('-full', action='store_true', help='tokenize every row, ignore the previous snapshot')
+    parser.add_argument('-workers', type=int, default=None, help='build processes (default: serial, 0: one per cpu)')
+    args = parser.parse_args()
+    out_dir = args.out_dir or os.path.join(args.data_dir, 'index')
+
+    start = time.time()
+    if args.engine in ('all', 'equity'):
+        compile_equity(args.data_dir, out_dir, args.full, args.workers)
+    if args.engine in ('all', 'crypto'):
+        compile_crypto(args.data_dir, out_dir, args.full, args.workers)
+    print(f"snapshots written to {out_dir} in {time.time() - start:.1f}s")
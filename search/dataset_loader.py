@@ -0,0 +1,121 @@
+"""
+typed loading of the exported tables
+
+only the columns an engine reads are parsed (usecols): text columns as str, numeric fields
+straight to float64. the exporter writes missing values as the string "__nan__", it is read
+as NaN at parse time, so numeric columns never hold mixed strings and floats
+
+the pipeline's merge stage also writes a search artifact next to every merged csv (same name, .npz): only
+the columns its engine reads (search_columns in compile_index.py), text as one utf-8 buffer with row
+offsets and a missing mask, numerics as float64 arrays. it is read without pickle and without parsing
+numbers, read_table takes either file. search_source only prefers an artifact that is not older than its csv
+
+    python search/dataset_loader.py -engine equity -out data/equity_nyse_exported_table.npz data/equity_nyse_exported_table.csv
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+NAN_SENTINEL = "__nan__"
+ARTIFACT_SUFFIX = ".npz"
+
+
+def read_table(path, text_columns, numeric_columns):
+    """ DataFrame of the text and numeric columns present in the csv (or search artifact) at path """
+    if path.endswith(ARTIFACT_SUFFIX):
+        return read_artifact(path, text_columns, numeric_columns)
+    header = set(pd.read_csv(path, nrows=0).columns)
+    dtype = {col: str for col in text_columns if col in header}
+    dtype.update({col: np.float64 for col in numeric_columns if col in header})
+    return pd.read_csv(path, usecols=list(dtype), dtype=dtype, na_values=[NAN_SENTINEL])
+
+
+def read_tables(paths, text_columns, numeric_columns):
+    """ the tables of several csvs one after the other, rows numbered from 0 """
+    tables = [read_table(path, text_columns, numeric_columns) for path in paths]
+    return pd.concat(tables, ignore_index=True)
+
+
+def extract_number(texts, pattern):
+    """ float64 of the first group of pattern in every text, NaN where it does not match """
+    return pd.to_numeric(texts.str.extract(pattern, expand=False), errors="coerce").to_numpy(dtype=np.float64)
+
+
+def search_source(path):
+    """ the search artifact next to an exported csv when the pipeline wrote one and it is at least
+        as new as the csv, else the csv. a csv refreshed without its artifact is read as is """
+    artifact = os.path.splitext(path)[0] + ARTIFACT_SUFFIX
+    try:
+        artifact_mtime = os.stat(artifact).st_mtime_ns
+    except OSError:
+        return path
+    try:
+        csv_mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return artifact
+    return artifact if artifact_mtime >= csv_mtime else path
+
+
+def write_artifact(path, table, text_columns, numeric_columns):
+    """ write the text and numeric columns table has to the .npz at path. missing text (NaN or the
+        sentinel) is kept as missing, numerics are coerced to float64 (the sentinel becomes NaN).
+        written to a temporary file first, readers never see a partial artifact """
+    arrays = {}
+    for col in text_columns:
+        if col not in table:
+            continue
+        values = table[col]
+        missing = (pd.isna(values) | values.astype(str).eq(NAN_SENTINEL)).to_numpy()
+        encoded = [b"" if m else str(v).encode("utf-8") for v, m in zip(values, missing)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        arrays["text." + col] = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        arrays["offsets." + col] = offsets
+        arrays["missing." + col] = missing
+    for col in numeric_columns:
+        if col in table:
+            arrays["numeric." + col] = pd.to_numeric(table[col], errors="coerce").to_numpy(dtype=np.float64)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def read_artifact(path, text_columns=None, numeric_columns=None):
+    """ DataFrame of the asked columns present in the artifact (None: all of them), text as str
+        with NaN where missing, like the csv read """
+    columns = {}
+    with np.load(path, allow_pickle=False) as npz:
+        kinds = {}
+        for key in npz.files:
+            kind, col = key.split(".", 1)
+            kinds.setdefault(kind, []).append(col)
+        text = kinds.get("text", []) if text_columns is None else [c for c in text_columns if c in kinds.get("text", [])]
+        numeric = kinds.get("numeric", []) if numeric_columns is None else [c for c in numeric_columns if c in kinds.get("numeric", [])]
+        for col in text:
+            blob = memoryview(npz["text." + col])
+            offsets = npz["offsets." + col].tolist()
+            missing = npz["missing." + col].tolist()
+            values = np.empty(len(missing), dtype=object)
+            for i, m in enumerate(missing):
+                values[i] = np.nan if m else str(blob[offsets[i]:offsets[i + 1]], "utf-8")
+            columns[col] = values
+        for col in numeric:
+            columns[col] = npz["numeric." + col]
+    return pd.DataFrame(columns)
+
+
+if __name__ == '__main__':
+    """ the engines import this module, their columns are only needed by the command line """
+    from compile_index import engine_classes, search_columns
+    parser = argparse.ArgumentParser()
+    parser.add_argument('tables', nargs='+', help='exported csvs or artifacts, concatenated in this order')
+    parser.add_argument('-engine', required=True, choices=list(engine_classes))
+    parser.add_argument('-out', required=True, help='artifact to write (.npz)')
+    args = parser.parse_args()
+
+    text_columns, numeric_columns = search_columns(args.engine)
+    table = read_tables(args.tables, text_columns, numeric_columns)
+    write_artifact(args.out, table, text_columns, numeric_columns)
+    print(f"{args.out}: {len(table)} rows, {os.path.getsize(args.out)} bytes")
@@ -0,0 +1,159 @@
+"""
+offline comparison of the tf-idf and bm25 rankings over a query log
+
+the log is either the web app's log (lines with "Equity Query: ..." / "Crypto Query: ...")
+or a plain text file with one query per line. every distinct query is run in both modes
+and the top k tickers are compared:
+
+    overlap   share of the tf-idf top k that is also in the bm25 top k
+    top1      the first ticker is the same
+    rbo       rank-biased overlap (p=0.9), 1 for identical rankings, weights the top ranks most
+    ms        mean query time of each mode, query cache off
+
+    python search/eval_ranking.py -log search/sample_queries.txt
+    python search/eval_ranking.py -log queries.txt -engine crypto -k 5 -index_dir data/index -out eval.json
+"""
+import io
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import contextlib
+from collections import Counter
+try:
+    from .illumenti_search import IllumentiSearch
+    from .illumenti_crypto_search import IllumentiCryptoSearch
+    from .compile_index import equity_sources, crypto_sources, default_data_dir
+    from .query_cache import QueryCache, normalize_query
+except ImportError:
+    from illumenti_search import IllumentiSearch
+    from illumenti_crypto_search import IllumentiCryptoSearch
+    from compile_index import equity_sources, crypto_sources, default_data_dir
+    from query_cache import QueryCache, normalize_query
+
+log_line = re.compile(r"(Equity|Crypto) Query: (.*?)(?: \(limit=[^)]*\))?\s*$")
+
+
+def read_query_log(path, engine):
+    """ distinct normalized queries of one engine and how often each was asked, most asked first.
+        a file with "... Query: ..." records is read as the app log, otherwise every line is a query """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        lines = f.read().splitlines()
+    records = [m for m in map(log_line.search, lines) if m]
+    if records:
+        queries = [m.group(2) for m in records if m.group(1).lower() == engine]
+    else:
+        queries = lines
+    counts = Counter(normalize_query(query) for query in queries)
+    counts.pop("", None)
+    return counts.most_common()
+
+
+def rbo(a, b, p=0.9):
+    """ rank-biased overlap of two rankings cut at the same depth (extrapolated, Webber et al. 2010) """
+    k = max(len(a), len(b))
+    if k == 0:
+        return 1.0
+    seen_a, seen_b, overlap, res = set(), set(), 0, 0.0
+    for d in range(1, k + 1):
+        if d <= len(a):
+            x = a[d - 1]
+            overlap += x in seen_b
+            seen_a.add(x)
+        if d <= len(b):
+            y = b[d - 1]
+            overlap += y in seen_a
+            seen_b.add(y)
+        res += overlap / d * p ** d
+    return (1 - p) / p * res + overlap / k * p ** k
+
+
+def compare(tfidf, bm25):
+    a, b = list(tfidf), list(bm25)
+    return {
+        "overlap": len(set(a) & set(b)) / len(a) if a else 1.0,
+        "top1": (a[:1] == b[:1]),
+        "rbo": rbo(a, b),
+        }
+
+
+def load_engine(engine, data_dir, index_dir):
+    search = IllumentiSearch() if engine == 'equity' else IllumentiCryptoSearch()
+    sources = equity_sources(data_dir) if engine == 'equity' else crypto_sources(data_dir)
+    if index_dir:
+        search.load_snapshot(os.path.join(index_dir, engine), sources=sources)
+    else:
+        search.load_dataset(*sources)
+        search.build_index()
+    search.query_cache = QueryCache(maxsize=0)
+    return search
+
+
+def run(search, query, k, scoring):
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        res, _ = search.query_page(query, limit=k, scoring=scoring)
+    return list(res or {}), (time.time() - start) * 1000
+
+
+def evaluate(search, queries, k):
+    rows = []
+    for query, count in queries:
+        tfidf, tfidf_ms = run(search, query, k, "tfidf")
+        bm25, bm25_ms = run(search, query, k, "bm25")
+        row = {"query": query, "count": count, "tfidf": tfidf, "bm25": bm25,
+               "tfidf_ms": tfidf_ms, "bm25_ms": bm25_ms}
+        row.update(compare(tfidf, bm25))
+        rows.append(row)
+    return rows
+
+
+def summary(rows):
+    n = len(rows)
+    if not n:
+        return {"queries": 0}
+    return {
+        "queries": n,
+        "overlap": sum(r["overlap"] for r in rows) / n,
+        "top1": sum(r["top1"] for r in rows) / n,
+        "rbo": sum(r["rbo"] for r in rows) / n,
+        "tfidf_ms": sum(r["tfidf_ms"] for r in rows) / n,
+        "bm25_ms": sum(r["bm25_ms"] for r in rows) / n,
+        }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('-log', required=True, help='app log or text file with one query per line')
+    parser.add_argument('-engine', default='both', choices=['equity', 'crypto', 'both'])
+    parser.add_argument('-k', type=int, default=10, help='compare the top k tickers')
+    parser.add_argument('-data_dir', default=default_data_dir, help='directory with the exported csv tables')
+    parser.add_argument('-index_dir', default=None, help='load snapshots from here instead of building from the csvs')
+    parser.add_argument('-out', default=None, help='write the per query rankings and metrics to this json file')
+    args = parser.parse_args()
+
+    engines = ['equity', 'crypto'] if args.engine == 'both' else [args.engine]
+    report = {}
+    for engine in engines:
+        queries = read_query_log(args.log, engine)
+        if not queries:
+            continue
+        with contextlib.redirect_stdout(io.StringIO()):
+            search = load_engine(engine, args.data_dir, args.index_dir)
+        rows = evaluate(search, queries, args.k)
+        report[engine] = {"summary": summary(rows), "queries": rows}
+
+        s = report[engine]["summary"]
+        print(f"{engine}: {s['queries']} distinct queries, top {args.k}")
+        print(f"  overlap {s['overlap']:.3f}  top1 {s['top1']:.3f}  rbo {s['rbo']:.3f}"
+              f"  tfidf {s['tfidf_ms']:.1f} ms  bm25 {s['bm25_ms']:.1f} ms")
+        print("  least similar:")
+        for r in sorted(rows, key=lambda r: r["rbo"])[:5]:
+            print(f"    {r['rbo']:.3f}  {r['query']!r}: tfidf {r['tfidf'][:5]}  bm25 {r['bm25'][:5]}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.stdout.flush()
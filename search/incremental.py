@@ -0,0 +1,46 @@
+"""
+incremental rebuilds: rows whose text fields did not change since the previous build
+reuse its tokens, only new or edited rows go through the tokenizer and stemmer again.
+postings, document frequencies and numeric columns are then rebuilt from the token
+lists and the new csv's with vectorized code, which is cheap next to stemming
+"""
+import hashlib
+
+
+def text_hash(values):
+    """ 64 bit hash of the text field values of one row """
+    h = hashlib.blake2b("\x1f".join(values).encode("utf-8"), digest_size=8)
+    return int.from_bytes(h.digest(), "little")
+
+
+class TokenReuse:
+    """ tokens of a previous build, looked up by the text hash of a row """
+    def __init__(self, previous=None):
+        self.previous = previous
+        self.rows = {}
+        self.reused = 0
+        if previous is not None and previous.text_hashes is not None and previous.doc_tokens is not None:
+            self.rows = {int(h): j for j, h in enumerate(previous.text_hashes)}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def get(self, h):
+        """ per field token lists of the previous row with the same text, None if there is none """
+        j = self.rows.get(h)
+        if j is None:
+            return None
+        self.reused += 1
+        return fields_tokens(self.previous.doc_tokens[j])
+
+
+def join_fields_tokens(fields_tokens):
+    """ one string per document: tokens separated by spaces, fields by tabs (tokens are alphanumeric) """
+    return "\t".join(" ".join(tokens) for tokens in fields_tokens)
+
+
+def fields_tokens(doc_tokens):
+    """ per field token lists, from either the lists themselves or their join_fields_tokens string """
+    if isinstance(doc_tokens, str):
+        return [field.split() for field in doc_tokens.split("\t")]
+    return [list(tokens) for tokens in doc_tokens]
@@ -0,0 +1,206 @@
+"""
+versioned binary snapshot of a built search engine
+
+a snapshot is a directory holding one .npy file per array plus a manifest.json,
+strings are stored as a single utf-8 blob with int64 offsets so every file can be
+memory-mapped read-only and shared between worker processes via the page cache
+"""
+import os, json, shutil
+import numpy as np
+try:
+    from .inverted_index import InvertedIndex
+    from .numeric_filter import NumericFilter, format_number
+    from .column_store import ColumnStore
+    from .incremental import join_fields_tokens
+    from .spell_index import SpellIndex
+    from .token_postings import TokenPostings
+except ImportError:
+    from inverted_index import InvertedIndex
+    from numeric_filter import NumericFilter, format_number
+    from column_store import ColumnStore
+    from incremental import join_fields_tokens
+    from spell_index import SpellIndex
+    from token_postings import TokenPostings
+
+FORMAT_VERSION = 8
+MANIFEST = "manifest.json"
+
+
+class SnapshotError(Exception):
+    """ raised when a snapshot is missing, stale or written by another format version """
+
+
+class StringColumn:
+    """ read-only sequence of strings backed by a utf-8 blob and offsets """
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        s, e = int(self.offsets[i]), int(self.offsets[i + 1])
+        return bytes(self.blob[s:e]).decode("utf-8")
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def tolist(self):
+        """ decode all strings with a single copy of the blob """
+        data = bytes(self.blob)
+        offsets = np.asarray(self.offsets).tolist()
+        return [data[s:e].decode("utf-8") for s, e in zip(offsets[:-1], offsets[1:])]
+
+
+def encode_strings(values):
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets
+
+
+def source_fingerprint(paths):
+    """ size and mtime of the source datasets, used to detect stale snapshots """
+    res = []
+    for p in paths:
+        st = os.stat(p)
+        res.append({"name": os.path.basename(p), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return res
+
+
+def write_snapshot(path, arrays, strings, meta):
+    """ write into a temp directory first and swap it in, readers never see a partial snapshot """
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name, arr in arrays.items():
+        np.save(os.path.join(tmp_path, name + ".npy"), np.ascontiguousarray(arr))
+    for name, values in strings.items():
+        blob, offsets = encode_strings(values)
+        np.save(os.path.join(tmp_path, name + ".blob.npy"), blob)
+        np.save(os.path.join(tmp_path, name + ".offsets.npy"), offsets)
+    manifest = dict(meta)
+    manifest["format_version"] = FORMAT_VERSION
+    manifest["arrays"] = sorted(arrays)
+    manifest["strings"] = sorted(strings)
+    with open(os.path.join(tmp_path, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=1)
+
+    old_path = None
+    if os.path.exists(path):
+        old_path = f"{path}.old-{os.getpid()}"
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if old_path:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+class Snapshot:
+    def __init__(self, path, manifest, arrays, strings):
+        self.path = path
+        self.manifest = manifest
+        self.arrays = arrays
+        self.strings = strings
+
+
+def read_snapshot(path, engine=None, sources=None, mmap_mode="r"):
+    manifest_path = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        raise SnapshotError(f"no snapshot at {path}")
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise SnapshotError(f"snapshot format {manifest.get('format_version')} != {FORMAT_VERSION}")
+    if engine is not None and manifest.get("engine") != engine:
+        raise SnapshotError(f"snapshot was built for {manifest.get('engine')}, not {engine}")
+    if sources is not None and manifest.get("sources") != source_fingerprint(sources):
+        raise SnapshotError(f"snapshot at {path} is stale w.r.t. its source datasets")
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in manifest["arrays"]}
+    strings = {
+        name: StringColumn(
+            np.load(os.path.join(path, name + ".blob.npy"), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, name + ".offsets.npy"), mmap_mode=mmap_mode))
+        for name in manifest["strings"]
+        }
+    return Snapshot(path, manifest, arrays, strings)
+
+
+def build_display_columns(numeric_filter):
+    """ field -> display string of every doc's value (see format_number), formatted once per build """
+    return {field: StringColumn(*encode_strings(format_number(v) for v in values.tolist()))
+            for field, values in numeric_filter.columns.items()}
+
+
+def engine_columns(search):
+    """ the columns the query path reads: numeric fields as float64 and text columns """
+    store = search.store
+    numeric = {field: store[field] for field in search.numeric_filter.columns}
+    text = {col: store[col].tolist() for col in search.snapshot_text_columns}
+    return numeric, text
+
+
+def compact_engine(search):
+    """ drop the DataFrame (the store holds every column the query path reads) and keep the
+        per row tokens as one string blob, the same in-memory layout as a loaded snapshot """
+    search.dataset = None
+    if search.doc_tokens is not None and not isinstance(search.doc_tokens, StringColumn):
+        search.doc_tokens = StringColumn(*encode_strings(join_fields_tokens(t) for t in search.doc_tokens))
+
+
+def write_engine_snapshot(search, path, engine, sources=()):
+    """ vocabulary, postings, numeric columns, ticker map and the token postings of the filter fields,
+        plus every row's tokens and text hash so the next build can reuse the unchanged rows """
+    numeric, text = engine_columns(search)
+    arrays = {"index." + k: v for k, v in search.index.to_arrays().items()}
+    arrays.update({"spell." + k: v for k, v in search.spell_index.to_arrays().items()})
+    arrays["doc.text_hash"] = search.text_hashes
+    for field, values in numeric.items():
+        arrays["numeric." + field] = values
+    strings = {"index.vocab": search.index.vocab_list()}
+    strings["doc.tokens"] = [t if isinstance(t, str) else join_fields_tokens(t) for t in search.doc_tokens]
+    for col, values in text.items():
+        strings["text." + col] = values
+    for field, postings in search.filter_postings.items():
+        arrays.update({f"filter.{field}.{k}": v for k, v in postings.to_arrays().items()})
+        strings[f"filter.{field}.terms"] = postings.terms
+    for field in numeric:
+        strings["display." + field] = search.display_columns[field].tolist()
+    meta = {
+        "engine": engine,
+        "n_docs": len(search.store),
+        "sources": source_fingerprint(sources),
+        "numeric_columns": sorted(numeric),
+        "filter_fields": sorted(search.filter_postings),
+        }
+    write_snapshot(path, arrays, strings, meta)
+
+
+def read_engine_snapshot(search, path, engine, sources=None):
+    """ restore an engine from a snapshot, postings stay memory-mapped """
+    snap = read_snapshot(path, engine=engine, sources=sources)
+    a = snap.arrays
+    vocab_list = snap.strings["index.vocab"].tolist()
+    search.index = InvertedIndex.from_arrays(
+        vocab_list, snap.manifest["n_docs"],
+        a["index.offsets"], a["index.doc_ids"], a["index.field_ids"], a["index.tf"], a["index.weights"],
+        a["index.df"], a["index.field_lengths"], a["index.field_weights"],
+        a["index.bm25_weights"], a["index.bm25_params"])
+    search.spell_index = SpellIndex.from_arrays(vocab_list, search.index.df, a["spell.hashes"], a["spell.term_ids"])
+    search.numeric_filter = NumericFilter({field: a["numeric." + field] for field in snap.manifest["numeric_columns"]})
+    search.display_columns = {field: snap.strings["display." + field] for field in snap.manifest["numeric_columns"]}
+    search.text_hashes = a["doc.text_hash"]
+    search.doc_tokens = snap.strings["doc.tokens"]
+    search.store = ColumnStore.build(
+        {col: snap.strings["text." + col].tolist() for col in search.snapshot_text_columns},
+        search.numeric_filter.columns)
+    search.filter_postings = {
+        field: TokenPostings.from_arrays(snap.strings[f"filter.{field}.terms"].tolist(),
+                                         a[f"filter.{field}.offsets"], a[f"filter.{field}.doc_ids"])
+        for field in snap.manifest["filter_fields"]}
+    search.dataset = None
+    search.map_tickers_to_index()
+    return snap
@@ -0,0 +1,284 @@
+import numpy as np
+from collections import Counter
+
+SCORING_MODES = ("tfidf", "bm25")
+
+
+class PartialPostings:
+    """ postings of a range of documents with range-local term and doc ids, see partial_postings """
+    def __init__(self, vocab, n_docs, term_ids, doc_ids, field_ids, tf, field_lengths):
+        self.vocab = vocab
+        self.n_docs = n_docs
+        self.term_ids = term_ids
+        self.doc_ids = doc_ids
+        self.field_ids = field_ids
+        self.tf = tf
+        self.field_lengths = field_lengths
+
+
+def partial_postings(docs_fields_tokens, n_fields=None):
+    """ (term, doc, field, tf) rows of some documents, terms numbered in first-occurrence order
+
+        docs_fields_tokens: per document, one token list per text field
+    """
+    vocab = {}
+    term_ids = []
+    doc_ids = []
+    field_ids = []
+    tfs = []
+    field_lengths = []
+    for d, fields_tokens in enumerate(docs_fields_tokens):
+        field_lengths.append([len(tokens) for tokens in fields_tokens])
+        for f, tokens in enumerate(fields_tokens):
+            for token, tf in Counter(tokens).items():
+                t = vocab.get(token)
+                if t is None:
+                    t = len(vocab)
+                    vocab[token] = t
+                term_ids.append(t)
+                doc_ids.append(d)
+                field_ids.append(f)
+                tfs.append(tf)
+    vocab_list = [None] * len(vocab)
+    for token, t in vocab.items():
+        vocab_list[t] = token
+    if n_fields is None:
+        n_fields = len(field_lengths[0]) if field_lengths else 0
+    return PartialPostings(vocab_list, len(field_lengths),
+                           np.asarray(term_ids, dtype=np.int64),
+                           np.asarray(doc_ids, dtype=np.int64),
+                           np.asarray(field_ids, dtype=np.uint8),
+                           np.minimum(np.asarray(tfs, dtype=np.int64), np.iinfo(np.uint16).max).astype(np.uint16),
+                           np.asarray(field_lengths, dtype=np.int32).reshape(-1, n_fields))
+
+
+class InvertedIndex:
+    """ compact inverted index over integer term ids and document ids, with per-field postings
+
+        postings are kept CSR-style in contiguous arrays: the postings of term t live in
+        [offsets[t], offsets[t + 1]), one row per (doc, field) the term occurs in:
+        doc_ids (int32, ascending), field_ids (uint8), tf (uint16) and weights (float32),
+        the row's share of the document score under the default field weights:
+            field_weight * tf / weighted doc length * idf
+        field_lengths holds the token count of every (doc, field), so other field weights
+        (or another scoring model) can be applied at query time without a rebuild
+
+        bm25_weights is the BM25F counterpart of weights: a term's whole contribution to a
+        document sits on its first (doc, field) row, the other rows of that doc hold 0,
+        so both modes score with the same single bincount
+    """
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocab = {}
+        self.n_docs = 0
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+        self.field_ids = np.zeros(0, dtype=np.uint8)
+        self.tf = np.zeros(0, dtype=np.uint16)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.df = np.zeros(0, dtype=np.int32)
+        self.field_lengths = np.zeros((0, 0), dtype=np.int32)
+        self.field_weights = np.zeros(0, dtype=np.float64)
+        self.bm25_weights = np.zeros(0, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.vocab)
+
+    def __contains__(self, token):
+        return token in self.vocab
+
+    def build(self, docs_fields_tokens, field_weights):
+        """ docs_fields_tokens: per document (in doc id order) one list of stemmed tokens per field,
+            field_weights: one boost per field """
+        return self.merge([partial_postings(docs_fields_tokens, len(field_weights))], field_weights)
+
+    def merge(self, partials, field_weights):
+        """ build from partial postings of consecutive document ranges (in doc id order),
+            term ids come out in first-occurrence order exactly as a single pass would give them """
+        vocab = {}
+        term_ids, doc_ids, field_ids, tfs, field_lengths = [], [], [], [], []
+        n_docs = 0
+        for part in partials:
+            local_to_global = np.empty(len(part.vocab), dtype=np.int64)
+            for t, token in enumerate(part.vocab):
+                g = vocab.get(token)
+                if g is None:
+                    g = len(vocab)
+                    vocab[token] = g
+                local_to_global[t] = g
+            term_ids.append(local_to_global[part.term_ids])
+            doc_ids.append(part.doc_ids + n_docs)
+            field_ids.append(part.field_ids)
+            tfs.append(part.tf)
+            field_lengths.append(part.field_lengths)
+            n_docs += part.n_docs
+
+        field_weights = np.asarray(field_weights, dtype=np.float64)
+        term_ids = np.concatenate(term_ids) if term_ids else np.zeros(0, dtype=np.int64)
+        doc_ids = np.concatenate(doc_ids).astype(np.int32) if doc_ids else np.zeros(0, dtype=np.int32)
+        field_ids = np.concatenate(field_ids) if field_ids else np.zeros(0, dtype=np.uint8)
+        tfs = np.concatenate(tfs) if tfs else np.zeros(0, dtype=np.uint16)
+        if field_lengths:
+            field_lengths = np.concatenate(field_lengths)
+        else:
+            field_lengths = np.zeros((0, len(field_weights)), dtype=np.int32)
+
+        """ group postings by term, (doc, field) rows keep their order inside each term (stable sort) """
+        order = np.argsort(term_ids, kind="stable")
+        term_ids = term_ids[order]
+        self.vocab = vocab
+        self.n_docs = n_docs
+        self.doc_ids = doc_ids[order]
+        self.field_ids = field_ids[order]
+        self.tf = tfs[order]
+        self.field_lengths = field_lengths
+        self.field_weights = field_weights
+        """ a term counts once per document for df, however many of its fields contain it """
+        first_in_doc = np.ones(len(term_ids), dtype=bool)
+        first_in_doc[1:] = (term_ids[1:] != term_ids[:-1]) | (self.doc_ids[1:] != self.doc_ids[:-1])
+        self.df = np.bincount(term_ids[first_in_doc], minlength=len(vocab)).astype(np.int32)
+        self.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=self.offsets[1:])
+        self.weights = self.row_weights(term_ids).astype(np.float32)
+        self.bm25_weights = self.bm25_row_weights(term_ids).astype(np.float32)
+        return self
+
+    def doc_norms(self, field_weights=None):
+        """ weighted document lengths """
+        w = self.field_weights if field_weights is None else np.asarray(field_weights, dtype=np.float64)
+        return self.field_lengths @ w
+
+    def row_weights(self, term_ids, field_weights=None, rows=slice(None)):
+        """ field_weight * tf / weighted doc length * idf of the posting rows (of the given term ids) """
+        w = self.field_weights if field_weights is None else np.asarray(field_weights, dtype=np.float64)
+        norms = self.doc_norms(w)
+        idf = 1.0 / np.maximum(self.df, 1)
+        return w[self.field_ids[rows]] * self.tf[rows] / norms[self.doc_ids[rows]] * idf[term_ids]
+
+    def field_norms(self):
+        """ BM25F length normalization of every (doc, field): 1 - b + b * length / average field length """
+        avg = self.field_lengths.mean(axis=0) if len(self.field_lengths) else np.zeros(self.field_lengths.shape[1])
+        avg = np.where(avg > 0, avg, 1.0)
+        return 1.0 - self.b + self.b * self.field_lengths / avg
+
+    def bm25_idf(self, df=None):
+        """ non-negative BM25 idf: ln(1 + (N - df + 0.5) / (df + 0.5)) """
+        df = self.df if df is None else df
+        return np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+
+    def bm25_row_weights(self, term_ids, field_weights=None, rows=slice(None)):
+        """ BM25F contribution of every (term, doc) on its first posting row, 0 on the doc's other rows
+
+            the field weighted, length normalized term frequencies of a doc are summed over its
+            fields before the k1 saturation, rows must come whole terms at a time (as query_rows gives them)
+        """
+        w = self.field_weights if field_weights is None else np.asarray(field_weights, dtype=np.float64)
+        doc_ids = self.doc_ids[rows]
+        field_ids = self.field_ids[rows]
+        tf = w[field_ids] * self.tf[rows] / self.field_norms()[doc_ids, field_ids]
+        res = np.zeros(len(doc_ids), dtype=np.float64)
+        if not len(doc_ids):
+            return res
+        """ rows of one (term, doc) are adjacent: docs ascend inside each term """
+        first = np.ones(len(doc_ids), dtype=bool)
+        first[1:] = (term_ids[1:] != term_ids[:-1]) | (doc_ids[1:] != doc_ids[:-1])
+        starts = np.flatnonzero(first)
+        tf = np.add.reduceat(tf, starts)
+        res[starts] = self.bm25_idf()[term_ids[starts]] * tf * (self.k1 + 1) / (tf + self.k1)
+        return res
+
+    def term_id(self, token):
+        return self.vocab.get(token)
+
+    def postings(self, token):
+        """ (doc_ids, weights) views for a token (one row per field it occurs in), empty arrays if unknown """
+        t = self.vocab.get(token)
+        if t is None:
+            return self.doc_ids[:0], self.weights[:0]
+        s, e = self.offsets[t], self.offsets[t + 1]
+        return self.doc_ids[s:e], self.weights[s:e]
+
+    def query_rows(self, tokens):
+        """ posting rows and their term ids for the known query tokens """
+        rows, term_ids = [], []
+        for token in tokens:
+            t = self.vocab.get(token)
+            if t is None:
+                continue
+            s, e = self.offsets[t], self.offsets[t + 1]
+            rows.append(np.arange(s, e))
+            term_ids.append(np.full(e - s, t, dtype=np.int64))
+        if not rows:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return np.concatenate(rows), np.concatenate(term_ids)
+
+    def score(self, tokens, field_weights=None, scoring="tfidf"):
+        """ tf-idf (or BM25F with scoring="bm25") score of every document for the query tokens, as a dense vector
+
+            with the build's field weights the precomputed row weights are summed,
+            other field weights re-derive the rows of the query terms on the fly
+        """
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"unknown scoring {scoring!r}, expected one of {SCORING_MODES}")
+        rows, term_ids = self.query_rows(tokens)
+        if scoring == "bm25":
+            if field_weights is None:
+                weights = self.bm25_weights[rows]
+            else:
+                weights = self.bm25_row_weights(term_ids, field_weights, rows)
+        elif field_weights is None:
+            weights = self.weights[rows]
+        else:
+            weights = self.row_weights(term_ids, field_weights, rows)
+        return np.bincount(self.doc_ids[rows], weights=weights, minlength=self.n_docs).astype(np.float32)
+
+    def score_bound(self, tokens, scoring="tfidf"):
+        """ the highest score a document can reach for the query tokens (one made of nothing else):
+            the sum of their idf, times k1 + 1 with BM25. tokens the index lacks count as the rarest (df 0).
+            it depends on the query only, so scores of different indexes divided by their bound compare """
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"unknown scoring {scoring!r}, expected one of {SCORING_MODES}")
+        df = np.array([self.df[self.vocab[token]] if token in self.vocab else 0 for token in tokens], dtype=np.float64)
+        if scoring == "bm25":
+            return float((self.bm25_idf(df) * (self.k1 + 1)).sum())
+        return float((1.0 / np.maximum(df, 1)).sum())
+
+    def vocab_list(self):
+        """ tokens in term id order """
+        tokens = [None] * len(self.vocab)
+        for token, t in self.vocab.items():
+            tokens[t] = token
+        return tokens
+
+    def to_arrays(self):
+        return {
+            "offsets": self.offsets,
+            "doc_ids": self.doc_ids,
+            "field_ids": self.field_ids,
+            "tf": self.tf,
+            "weights": self.weights,
+            "df": self.df,
+            "field_lengths": self.field_lengths,
+            "field_weights": self.field_weights,
+            "bm25_weights": self.bm25_weights,
+            "bm25_params": np.array([self.k1, self.b], dtype=np.float64),
+            }
+
+    @classmethod
+    def from_arrays(cls, vocab_list, n_docs, offsets, doc_ids, field_ids, tf, weights, df, field_lengths, field_weights,
+                    bm25_weights, bm25_params):
+        """ wrap existing (possibly memory-mapped) arrays without copying them """
+        index = cls(k1=float(bm25_params[0]), b=float(bm25_params[1]))
+        index.vocab = {token: t for t, token in enumerate(vocab_list)}
+        index.n_docs = int(n_docs)
+        index.offsets = offsets
+        index.doc_ids = doc_ids
+        index.field_ids = field_ids
+        index.tf = tf
+        index.weights = weights
+        index.df = df
+        index.field_lengths = field_lengths
+        index.field_weights = field_weights
+        index.bm25_weights = bm25_weights
+        return index
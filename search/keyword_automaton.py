@@ -0,0 +1,86 @@
+"""
+multi-word keyword detection over query tokens
+
+an engine's condition keywords ("price earnings ratio", "24 hours volume", ...) are tokenized
+like the query (stemmed, stop words kept) and compiled once into a token level Aho-Corasick
+automaton, so a clause is scanned once whatever the number of keywords and a keyword is found
+anywhere in it. the stemmed phrase ("price earn ratio") is the keyword's canonical name, the
+key of map_from_keyword_to_field and of the plan's conditions
+"""
+from collections import deque
+
+
+class KeywordAutomaton:
+    """ token level Aho-Corasick automaton, matches are leftmost-longest and do not overlap """
+    def __init__(self, phrases=()):
+        """ phrases: (token tuple, value) pairs, a phrase given twice keeps its first value """
+        self.goto = [{}]
+        self.fail = [0]
+        """ per state: (length, value) of every phrase ending there, longest first """
+        self.out = [[]]
+        for tokens, value in phrases:
+            state = 0
+            for token in tokens:
+                nxt = self.goto[state].get(token)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][token] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            if state and not self.out[state]:
+                self.out[state].append((len(tokens), value))
+        """ failure links breadth first, every state also reports the phrases of its failure state """
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and token not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(token, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+                queue.append(nxt)
+
+    def __len__(self):
+        return len(self.goto) - 1
+
+    def matches(self, tokens):
+        """ [(start, end, value)] of the phrases in tokens, in order; of overlapping phrases the one
+            starting first wins, then the longest """
+        found = []
+        state = 0
+        for i, token in enumerate(tokens):
+            while state and token not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(token, 0)
+            for length, value in self.out[state]:
+                found.append((i + 1 - length, i + 1, value))
+        found.sort(key=lambda m: (m[0], m[0] - m[1]))
+        res, end = [], 0
+        for m in found:
+            if m[0] >= end:
+                res.append(m)
+                end = m[1]
+        return res
+
+    def first(self, tokens):
+        """ value of the first phrase in tokens, None without one """
+        res = self.matches(tokens)
+        return res[0][2] if res else None
+
+
+def compile_keywords(map_from_keyword_to_field_raw, normalizer):
+    """ the automaton of an engine's condition keywords, canonical keyword -> field and
+        canonical keyword -> its first raw keyword (the default result field name) """
+    phrases, fields, labels = [], {}, {}
+    for raw, field in map_from_keyword_to_field_raw.items():
+        tokens = tuple(normalizer.tokenize(raw, with_rm_stopwords=False))
+        if not tokens:
+            continue
+        keyword = " ".join(tokens)
+        phrases.append((tokens, keyword))
+        fields.setdefault(keyword, field)
+        labels.setdefault(keyword, raw)
+    return KeywordAutomaton(phrases), fields, labels
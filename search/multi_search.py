@@ -0,0 +1,66 @@
+"""
+one query over several engines (equity and crypto): the query is parsed once, every engine
+ranks it in its own thread and the pages are merged into a single ranking
+
+raw text scores of different engines are not comparable (other vocabularies, document counts
+and lengths), so each is divided by its engine's score bound of the query: the score of a
+document made of the query terms alone (see InvertedIndex.score_bound). it depends on the query,
+not on how well the engine matched it, so a weak best match stays weak. engines hand over their
+first offset + limit results by text score and the merge sorts them by the normalized score,
+equal scores (e.g. queries without text terms, where every score is 0) alternate between engines
+in engine order. pages stay consistent with each other. engines that miss the latency budget
+are left out of the page
+"""
+import time
+import logging
+from concurrent.futures import wait
+try:
+    from .query_parser import parse_query
+except ImportError:
+    from query_parser import parse_query
+
+logger = logging.getLogger(__name__)
+
+
+def merge_ranked(engine_results, offset=0, limit=None):
+    """ engine_results: name -> ([SearchResult], score bound of the query, total) in text score order.
+        returns the merged page by normalized score: [{"symbol", "type", "score", **fields}] """
+    merged = []
+    for e, (name, (results, bound, _)) in enumerate(engine_results.items()):
+        for rank, result in enumerate(results):
+            normalized = round(result.score / bound, 5) if bound > 0 else 0.0
+            item = {"symbol": result.symbol, "type": name, "score": normalized}
+            item.update(result.fields)
+            merged.append(((-normalized, rank, e), item))
+    merged.sort(key=lambda entry: entry[0])
+    stop = None if limit is None else offset + limit
+    return [item for _, item in merged[offset:stop]]
+
+
+def search_all(engines, Q, executor, limit=None, offset=0, scoring=None, budget=None):
+    """ run Q on every engine (name -> engine) concurrently and merge the results
+
+        budget: seconds for the whole fan-out, engines still running then are reported in
+        timed_out and their results dropped (they finish in the background and fill the cache).
+        returns (page, total matches of the engines that answered, timed_out names, failed names)
+    """
+    start = time.time()
+    normalizer = next(iter(engines.values())).normalizer
+    parsed = parse_query(Q, normalizer)
+    """ every engine ranks the first offset + limit results, the merged page is cut from those """
+    n = None if limit is None else offset + limit
+    futures = {name: executor.submit(engine.ranked_results, parsed, n, scoring) for name, engine in engines.items()}
+    remaining = None if budget is None else max(0.0, budget - (time.time() - start))
+    wait(futures.values(), timeout=remaining)
+
+    engine_results, timed_out, failed = {}, [], []
+    for name, future in futures.items():
+        if not future.done():
+            timed_out.append(name)
+        elif future.exception() is not None:
+            logger.warning("%s search failed: %r", name, future.exception())
+            failed.append(name)
+        else:
+            engine_results[name] = future.result()
+    total = sum(res[2] for res in engine_results.values())
+    return merge_ranked(engine_results, offset, limit), total, timed_out, failed
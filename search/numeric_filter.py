@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+
+def lerp(a, b, t):
+    """ linear interpolation exactly as numpy (and so pandas .quantile) computes it """
+    diff = b - a
+    if t >= 0.5:
+        return b - diff * (1.0 - t)
+    return a + diff * t
+
+
+def partition_quantile(values, q):
+    """ quantile of the non-NaN values with linear interpolation, via np.partition instead of a full sort """
+    values = values[~np.isnan(values)]
+    n = len(values)
+    if n == 0:
+        return np.nan
+    pos = q * (n - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, n - 1)
+    part = np.partition(values, [lo, hi])
+    return lerp(part[lo], part[hi], pos - lo)
+
+
+def format_number(value):
+    """ display string of a result value: one decimal, "12.3 bn" / "45.6 mm" above a billion / million """
+    text = "{:.1f}".format(value)
+    rounded = float(text)
+    if rounded > 1000000000:
+        return "{:.1f}".format(rounded / 1000000000.0) + " bn"
+    if rounded > 1000000:
+        return "{:.1f}".format(rounded / 1000000.0) + " mm"
+    return text
+
+
+def format_market_cap(value):
+    """ market cap shown with every crypto result: "1.2 bn", "3.4 mm", "5.6 k" """
+    if value > 1000000000:
+        return "{:.1f}".format(value / 1000000000.0) + " bn"
+    if value > 1000000:
+        return "{:.1f}".format(value / 1000000.0) + " mm"
+    if value > 1000:
+        return "{:.1f}".format(value / 1000.0) + " k"
+    return "{:.1f}".format(value)
+
+
+class NumericFilter:
+    """ columnar engine for the numeric conditions of a query
+
+        every field is one float64 array indexed by doc id (NaN where the value is missing),
+        conditions are evaluated as boolean masks over the candidate doc id array.
+        explicit thresholds ("above 10") are answered from a per-field range index: the
+        non-NaN values sorted ascending with their doc ids, searched with a binary search.
+        "ranked by <field>" orders candidates by a per-field rank array (see rank_key)
+    """
+    high_quantile = 0.75
+    low_quantile = 0.25
+
+    def __init__(self, columns):
+        self.columns = {field: np.asarray(values, dtype=np.float64) for field, values in columns.items()}
+        self.nan_masks = {field: np.isnan(values) for field, values in self.columns.items()}
+        self.n_docs = len(next(iter(self.columns.values()))) if self.columns else 0
+        self.sorted_values = {}
+        self.sorted_ids = {}
+        for field, values in self.columns.items():
+            order = np.argsort(values, kind="stable")
+            n_valid = len(values) - int(self.nan_masks[field].sum())
+            self.sorted_ids[field] = order[:n_valid].astype(np.int32)
+            self.sorted_values[field] = values[self.sorted_ids[field]]
+        self.ranks_descending = {field: self.dense_ranks(field) for field in self.columns}
+        self.ranks_ascending = {field: np.where(ranks < 0, -1, ranks.max(initial=-1) - ranks).astype(np.int32)
+                                for field, ranks in self.ranks_descending.items()}
+
+    def dense_ranks(self, field):
+        """ per doc position of its value among the distinct values (ascending, equal values share it), -1 if missing """
+        sorted_values = self.sorted_values[field]
+        ranks = np.full(self.n_docs, -1, dtype=np.int32)
+        if len(sorted_values):
+            ranks[self.sorted_ids[field]] = np.concatenate(([0], np.cumsum(np.diff(sorted_values) != 0)))
+        return ranks
+
+    def rank_key(self, field, descending=True):
+        """ per doc sort key for ranked_page (higher first): the rank of its value, reversed when
+            ascending, missing values always come last """
+        if descending:
+            return self.ranks_descending[field]
+        return self.ranks_ascending[field]
+
+    @classmethod
+    def from_dataset(cls, dataset, fields):
+        columns = {}
+        for field in sorted(set(fields)):
+            if field in dataset.columns:
+                columns[field] = pd.to_numeric(dataset[field], errors="coerce").to_numpy(dtype=np.float64)
+        return cls(columns)
+
+    def __contains__(self, field):
+        return field in self.columns
+
+    def value(self, field, doc_id):
+        return self.columns[field][doc_id]
+
+    def range_ids(self, field, higher, thresh):
+        """ doc ids with value > thresh (higher) or < thresh, from the sorted range index """
+        sorted_values = self.sorted_values[field]
+        if np.isnan(thresh):
+            return self.sorted_ids[field][:0]
+        if higher:
+            return self.sorted_ids[field][np.searchsorted(sorted_values, thresh, side="right"):]
+        return self.sorted_ids[field][:np.searchsorted(sorted_values, thresh, side="left")]
+
+    def intersect(self, candidates, ids):
+        """ keep the candidates (in their order) that are in ids """
+        mask = np.zeros(self.n_docs, dtype=bool)
+        mask[ids] = True
+        return candidates[mask[candidates]]
+
+    def condition_mask(self, candidates, field, higher, value):
+        """ mask over candidates for one [keyword, higher, value] condition, missing values never pass """
+        values = self.columns[field][candidates]
+        if value is None:
+            thresh = partition_quantile(values, self.high_quantile if higher else self.low_quantile)
+        else:
+            thresh = value
+        with np.errstate(invalid="ignore"):
+            if higher:
+                return values > thresh
+            return values < thresh
+
+    def full_quantile(self, field, q):
+        """ quantile over every document, read straight from the sorted values """
+        sorted_values = self.sorted_values[field]
+        n = len(sorted_values)
+        if n == 0:
+            return np.nan
+        pos = q * (n - 1)
+        lo = int(np.floor(pos))
+        hi = min(lo + 1, n - 1)
+        return lerp(sorted_values[lo], sorted_values[hi], pos - lo)
+
+    def apply(self, candidates, conditions, map_from_keyword_to_field):
+        """ apply the conditions one after the other (quantiles are taken over the surviving candidates),
+            conditions on unknown keywords or fields are skipped.
+            candidates=None means every document, the first condition then comes straight off the range index """
+        if candidates is not None:
+            candidates = np.asarray(candidates, dtype=np.int64)
+        for keyword, higher, value in conditions:
+            field = map_from_keyword_to_field.get(keyword)
+            if field not in self.columns:
+                continue
+            if candidates is None:
+                thresh = value
+                if thresh is None:
+                    thresh = self.full_quantile(field, self.high_quantile if higher else self.low_quantile)
+                candidates = np.sort(self.range_ids(field, higher, thresh)).astype(np.int64)
+            elif value is not None:
+                candidates = self.intersect(candidates, self.range_ids(field, higher, value))
+            else:
+                candidates = candidates[self.condition_mask(candidates, field, higher, value)]
+        if candidates is None:
+            return np.zeros(0, dtype=np.int64)
+        return candidates
@@ -0,0 +1,72 @@
+"""
+process-pool index build: rows are split into contiguous chunks, each worker tokenizes
+its chunk and turns it into partial postings, the parent merges the chunks in row order.
+term ids, postings and document frequencies come out identical to a single-process build
+"""
+import os
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+try:
+    from .inverted_index import InvertedIndex, partial_postings
+    from .token_normalizer import TokenNormalizer
+except ImportError:
+    from inverted_index import InvertedIndex, partial_postings
+    from token_normalizer import TokenNormalizer
+
+_normalizer = None
+
+
+def _init_worker(stop_stems):
+    global _normalizer
+    _normalizer = TokenNormalizer(stop_stems)
+
+
+def _tokenize_chunk(rows):
+    """ rows: per document the text of every field -> per document the tokens of every field """
+    return [[_normalizer.tokenize(text) for text in field_texts] for field_texts in rows]
+
+
+def chunks(items, n_chunks):
+    """ n_chunks contiguous slices of about the same size, in order """
+    n_chunks = max(1, min(n_chunks, len(items)))
+    size, extra = divmod(len(items), n_chunks)
+    res, start = [], 0
+    for c in range(n_chunks):
+        end = start + size + (1 if c < extra else 0)
+        res.append(items[start:end])
+        start = end
+    return res
+
+
+def resolve_workers(workers):
+    """ None or 1: serial, 0 or negative: one per cpu """
+    if workers is None:
+        return 1
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def make_pool(normalizer, workers):
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                               initargs=(normalizer.stop_stems,))
+
+
+def tokenize_rows(normalizer, rows, workers=1, pool=None):
+    """ tokenize every field of the rows (per document a list of field texts), in a process pool when workers > 1 """
+    if workers <= 1 or len(rows) < 2 * workers:
+        return [[normalizer.tokenize(text) for text in field_texts] for field_texts in rows]
+    """ a few chunks per worker keeps the pool busy when some rows are much longer than others """
+    res = []
+    for part in pool.map(_tokenize_chunk, chunks(rows, 4 * workers)):
+        res.extend(part)
+    return res
+
+
+def build_inverted_index(docs_fields_tokens, field_weights, workers=1, pool=None):
+    """ partial postings per contiguous document range in the pool, merged in document order """
+    docs_fields_tokens = list(docs_fields_tokens)
+    if workers <= 1 or len(docs_fields_tokens) < 2 * workers:
+        return InvertedIndex().build(docs_fields_tokens, field_weights)
+    partials = pool.map(partial_postings, chunks(docs_fields_tokens, workers), repeat(len(field_weights)))
+    return InvertedIndex().merge(list(partials), field_weights)
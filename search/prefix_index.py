@@ -0,0 +1,101 @@
+import numpy as np
+try:
+    from .ranking import top_k
+except ImportError:
+    from ranking import top_k
+
+
+def normalize_prefix(text):
+    """ lower case, single spaces, as keys and typed prefixes are compared """
+    return " ".join(str(text).lower().split())
+
+
+class PrefixIndex:
+    """ typeahead over ticker symbols and names
+
+        every entry (row) gets one key for its symbol and one for each word start of its name
+        ("apple inc" -> "apple inc", "inc"), so "aapl", "app" and "inc" all complete to Apple.
+        keys are utf-8 bytes cut at max_key bytes in one sorted fixed width numpy array:
+        a prefix is two binary searches, the entries in between are ranked by market cap,
+        symbol and whole-name matches ahead of matches on a later word of the name
+    """
+    def __init__(self, max_key=32):
+        self.max_key = max_key
+        self.keys = np.zeros(0, dtype=f"S{max_key}")
+        self.key_entries = np.zeros(0, dtype=np.int32)
+        self.key_rank = np.zeros(0, dtype=np.float64)
+        self.key_groups = np.zeros(0, dtype=np.int64)
+        self.key_leads = np.zeros(0, dtype=bool)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @classmethod
+    def build(cls, symbols, names, rank, groups=None, max_key=32):
+        """ symbols, names: per entry; rank: per entry sort key (descending, NaN last);
+            groups: per entry code, only the best entry of a group is suggested (default: none shared) """
+        index = cls(max_key)
+        keys, entries, leads = [], [], []
+        for i, (symbol, name) in enumerate(zip(symbols, names)):
+            """ key -> lead: the symbol or the whole name, rather than a later word of the name """
+            entry_keys = {}
+            words = normalize_prefix(name).split(" ")
+            for w in range(len(words) - 1, -1, -1):
+                entry_keys[" ".join(words[w:])] = w == 0
+            entry_keys[normalize_prefix(symbol)] = True
+            entry_keys.pop("", None)
+            for key in sorted(entry_keys):
+                keys.append(key.encode("utf-8")[:max_key])
+                entries.append(i)
+                leads.append(entry_keys[key])
+        keys = np.array(keys, dtype=f"S{max_key}")
+        order = np.argsort(keys, kind="stable")
+        index.keys = keys[order]
+        index.key_entries = np.asarray(entries, dtype=np.int32)[order]
+        """ lead keys first ("c" completes to companies named C.. before ".. Common Stock"), then by rank """
+        rank = np.nan_to_num(np.asarray(rank, dtype=np.float64), nan=-np.inf)
+        positions = np.empty(len(rank), dtype=np.float64)
+        """ rank positions, equal ranks keep the entry order """
+        positions[np.argsort(-rank, kind="stable")] = np.arange(len(rank) - 1, -1, -1)
+        index.key_leads = np.asarray(leads, dtype=bool)[order]
+        index.key_rank = positions[index.key_entries] + len(rank) * index.key_leads
+        if groups is None:
+            groups = np.arange(len(rank))
+        index.key_groups = np.asarray(groups, dtype=np.int64)[index.key_entries]
+        return index
+
+    def key_range(self, prefix):
+        """ [lo, hi) of the keys starting with the normalized prefix """
+        p = normalize_prefix(prefix).encode("utf-8")[:self.max_key]
+        lo = np.searchsorted(self.keys, p, side="left")
+        if len(p) == self.max_key:
+            """ a full width prefix can only equal a (cut) key """
+            hi = np.searchsorted(self.keys, p, side="right")
+        else:
+            hi = np.searchsorted(self.keys, p + b"\xff", side="left")
+        return int(lo), int(hi)
+
+    def complete(self, prefix, limit=10):
+        """ entry ids of the best ranked entries with a key starting with prefix, best first """
+        return [entry for entry, _ in self.matches(prefix, limit)]
+
+    def matches(self, prefix, limit=10):
+        """ (entry id, lead) of the best ranked entries with a key starting with prefix, best first.
+            lead: the symbol or the whole name matched, rather than a later word of the name """
+        if not normalize_prefix(prefix):
+            return []
+        lo, hi = self.key_range(prefix)
+        candidates = np.arange(lo, hi)
+        """ an entry has a few keys (symbol, name words) that may share the prefix """
+        k = 4 * limit
+        while True:
+            res, seen = [], set()
+            for key in top_k(candidates, self.key_rank, k):
+                group = self.key_groups[key]
+                if group not in seen:
+                    seen.add(group)
+                    res.append((int(self.key_entries[key]), bool(self.key_leads[key])))
+            if len(res) >= limit or k >= len(candidates):
+                return res[:limit]
+            """ several keys of the same entries took the places, widen the selection """
+            k = min(len(candidates), 2 * k)
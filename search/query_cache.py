@@ -0,0 +1,128 @@
+"""
+result cache in front of the search engines' query path
+
+an in-process LRU with a TTL, keyed by the normalized query (plus the page asked for).
+the cache carries the dataset version it was filled for: reloading a dataset invalidates it.
+with shared_dir set, results are also written to one pickle file per key under
+<shared_dir>/<version>/ so every gunicorn worker (and the next deploy) can reuse them
+"""
+import os, time, pickle, hashlib, shutil, threading
+from collections import OrderedDict
+
+
+def normalize_query(Q):
+    """ lower case, single spaces: "Best  Tech" and "best tech" are the same query """
+    return " ".join(Q.lower().split())
+
+
+def dataset_version(fingerprint):
+    """ short stable id of a dataset fingerprint (any json-able object) """
+    return hashlib.sha1(repr(fingerprint).encode("utf-8")).hexdigest()[:16]
+
+
+class QueryCache:
+    def __init__(self, maxsize=1024, ttl=300.0, shared_dir=None):
+        """ ttl: seconds an entry is served, None for entries that never expire """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared_dir = shared_dir
+        self.version = None
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def shared_path(self, key):
+        if not self.shared_dir or self.version is None:
+            return None
+        name = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.shared_dir, self.version, name + ".pkl")
+
+    def get(self, key):
+        """ cached value or None """
+        if self.maxsize <= 0:
+            return None
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                stored, value = entry
+                if self.ttl is None or now - stored <= self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.entries[key]
+        value = self.get_shared(key, now)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+            self.store(key, value, now)
+        return value
+
+    def get_shared(self, key, now):
+        path = self.shared_path(key)
+        if path is None:
+            return None
+        try:
+            if self.ttl is not None and now - os.path.getmtime(path) > self.ttl:
+                return None
+            with open(path, "rb") as f:
+                stored_key, value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        return value if stored_key == key else None
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.store(key, value, time.time())
+        self.put_shared(key, value)
+
+    def store(self, key, value, now):
+        self.entries[key] = (now, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def put_shared(self, key, value):
+        """ write-then-rename, a reader in another worker never sees a partial file """
+        path = self.shared_path(key)
+        if path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+            with open(tmp_path, "wb") as f:
+                pickle.dump((key, value), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def invalidate(self, version=None):
+        """ drop every cached result, the shared tier moves on to the new dataset version """
+        with self.lock:
+            self.entries.clear()
+            self.version = version
+        if self.shared_dir and os.path.isdir(self.shared_dir):
+            for name in os.listdir(self.shared_dir):
+                if name != version:
+                    shutil.rmtree(os.path.join(self.shared_dir, name), ignore_errors=True)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "version": self.version,
+                "shared": bool(self.shared_dir),
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                }
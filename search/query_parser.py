@@ -0,0 +1,229 @@
+"""
+query parsing shared by the equity and crypto engines
+
+parse_query does the engine independent part once per query: the normalized text and the
+"best" / "to the moon" flags, words are stemmed on demand. every engine compiles its grammar
+(screened words, clause keywords such as "with" or "led by", text rewrites) into a QueryGrammar
+once; QueryGrammar.plan turns a parsed query into a QueryPlan in a single pass over its tokens
+and caches the plan under the normalized query. plans are immutable and nothing is stored on
+the engine, so one plan can be reused by repeated queries and by several threads at once.
+condition and ranking keywords are found by the engine's keyword automaton (keyword_automaton.py)
+"""
+import re
+import typing as t
+from dataclasses import dataclass
+try:
+    from .query_cache import QueryCache, normalize_query
+    from .keyword_automaton import KeywordAutomaton
+except ImportError:
+    from query_cache import QueryCache, normalize_query
+    from keyword_automaton import KeywordAutomaton
+
+
+""" a comma between digits followed by a group of three digits: "1,000,000" is 1000000 """
+thousands_separator = re.compile(r"(?<=\d),(?=\d{3}\b)")
+
+
+@dataclass(frozen=True)
+class QueryPlan:
+    text: t.Tuple[str, ...] = ()
+    condition: t.Tuple[t.Tuple[t.Any, ...], ...] = () #field, larger than (vs smaller than), value (None means bool indicates low/high)
+    location: t.Tuple[str, ...] = () #State, City (headquarter)
+    leadership: t.Tuple[str, ...] = () #names
+    ranking: t.Tuple[t.Any, ...] = () #field, descend (true) or ascend (false)
+    launching: t.Tuple[str, ...] = () #Year (crypto)
+
+
+class ParsedQuery:
+    """ engine independent part of a query, see parse_query """
+    def __init__(self, text, words, normalizer, best, to_the_moon):
+        self.text = text
+        self.words = words
+        self.normalizer = normalizer
+        self.best = best
+        self.to_the_moon = to_the_moon
+        self.word_tokens = {}
+
+    def tokens(self, word):
+        """ stemmed tokens of a word (stop words kept, they carry the grammar), once per query.
+            thousands separators are dropped from the raw word first, the tokenizer would split
+            "1,000" into "1" and "000" """
+        res = self.word_tokens.get(word)
+        if res is None:
+            res = self.word_tokens[word] = self.normalizer.tokenize(thousands_separator.sub("", word), with_rm_stopwords=False)
+        return res
+
+
+def parse_query(Q, normalizer):
+    """ normalize and split into words """
+    text = normalize_query(Q)
+    return ParsedQuery(text, text.split(" ") if text else [], normalizer,
+                       best='best' in text or 'lambo' in text,
+                       to_the_moon='to the moon' in text)
+
+
+""" condition operators (stemmed): a comparison with a value, or a bare low / high """
+comparisons = {"abov": True, "below": False}
+comparisons_than = {"higher": True, "lower": False}
+extremes = {"high": True, "low": False}
+multipliers = {"million": 1e6, "billion": 1e9}
+
+
+def split_on(tokens, separator):
+    part = []
+    for token in tokens:
+        if token == separator:
+            yield part
+            part = []
+        else:
+            part.append(token)
+    yield part
+
+
+def parse_value(tokens):
+    """ ["0", "5"] -> 0.5, ["10", "million"] -> 1e7 (the tokenizer splits "0.5" into "0 5"), None without a number """
+    digits, scale = [], 1.0
+    for token in tokens:
+        if token.isdigit() and len(digits) < 2:
+            digits.append(token)
+        elif token in multipliers:
+            scale = multipliers[token]
+    if not digits:
+        return None
+    return float(".".join(digits)) * scale
+
+
+def condition_of(keyword, higher, value_tokens, extreme):
+    """ a comparison needs a number, a bare high / low does not """
+    if keyword is None:
+        return None
+    if higher is not None:
+        value = parse_value(value_tokens)
+        return None if value is None else (keyword, higher, value)
+    if extreme is not None:
+        return (keyword, extreme, None)
+    return None
+
+
+def parse_conditions(tokens, keywords):
+    """ "high pe and debt ratio below 0 5" -> (("pe", True, None), ("debt ratio", False, 0.5))
+
+        one scan over the clause: keywords (a KeywordAutomaton) finds the known keyword phrases,
+        the tokens in between are comparators, a bare high / low and the value; "and" ends a
+        condition. a condition takes its first keyword and its first comparator (or high / low),
+        the value is read from the tokens after the comparator
+    """
+    phrases = {start: (end, keyword) for start, end, keyword in keywords.matches(tokens)}
+    conditions = []
+    keyword = higher = extreme = None
+    value_tokens = []
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if i in phrases:
+            end, phrase_keyword = phrases[i]
+            keyword = keyword or phrase_keyword
+            i = end
+            continue
+        if token == "and":
+            conditions.append(condition_of(keyword, higher, value_tokens, extreme))
+            keyword = higher = extreme = None
+            value_tokens = []
+        elif higher is not None:
+            value_tokens.append(token)
+        elif token in comparisons:
+            higher = comparisons[token]
+        elif token in comparisons_than and i + 1 < len(tokens) and tokens[i + 1] == "than":
+            higher = comparisons_than[token]
+            i += 1
+        elif token in extremes and extreme is None:
+            extreme = extremes[token]
+        i += 1
+    conditions.append(condition_of(keyword, higher, value_tokens, extreme))
+    return tuple(c for c in conditions if c is not None)
+
+
+def parse_ranking(tokens, keywords):
+    """ ["market", "cap", "ascend"] -> ("market cap", False), the words as they are without a known keyword """
+    descending = True
+    if tokens and tokens[-1] in ("ascend", "descend"):
+        tokens, descending = tokens[:-1], tokens[-1] != "ascend"
+    return (keywords.first(tokens) or " ".join(tokens), descending)
+
+
+class QueryGrammar:
+    """ one engine's query grammar, compiled once
+
+        screened_words: words dropped before parsing (plus a leading "show me")
+        clauses: (keyword tokens, field) pairs, e.g. (("led", "by"), "leadership"), the tokens after a
+            keyword up to the next one fill the field; a keyword as the very last token is text
+        rewrites: (old, new) replacements on the query text before screening
+        keywords: KeywordAutomaton of the condition / ranking keywords, see keyword_automaton.py
+    """
+    def __init__(self, screened_words, clauses, rewrites=(), keywords=None, cache_size=4096):
+        self.screened_words = frozenset(screened_words)
+        """ first token -> keywords starting with it, in clause order """
+        self.keywords = {}
+        for keyword, clause_field in clauses:
+            self.keywords.setdefault(keyword[0], []).append((tuple(keyword), clause_field))
+        self.rewrites = tuple(rewrites)
+        self.condition_keywords = keywords if keywords is not None else KeywordAutomaton()
+        self.plans = QueryCache(maxsize=cache_size, ttl=None)
+
+    def plan(self, parsed):
+        """ the QueryPlan of a parsed query, cached by its normalized text """
+        res = self.plans.get(parsed.text)
+        if res is None:
+            res = self.compile(parsed)
+            self.plans.put(parsed.text, res)
+        return res
+
+    def tokens(self, parsed):
+        """ stemmed tokens of the screened words """
+        words = parsed.words
+        if self.rewrites:
+            text = " ".join(words)
+            for old, new in self.rewrites:
+                text = text.replace(old, new)
+            words = text.split(" ")
+        if len(words) > 1 and words[0] == "show" and words[1] == "me":
+            words = words[2:]
+        res = []
+        for w in words:
+            if w and w not in self.screened_words:
+                res.extend(parsed.tokens(w))
+        return res
+
+    def split_clauses(self, tokens):
+        """ {"text": [...], "condition": [...], ...} in one pass, a field given twice keeps its last clause,
+            a keyword that ends the query leaves its field out """
+        clauses = {}
+        clause_field, start, i = "text", 0, 0
+        while i < len(tokens) - 1:
+            for keyword, new_field in self.keywords.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(keyword)]) == keyword:
+                    clauses[clause_field] = tokens[start:i]
+                    clause_field, start = new_field, i + len(keyword)
+                    i = start
+                    break
+            else:
+                i += 1
+        if start < len(tokens):
+            clauses[clause_field] = tokens[start:]
+        return clauses
+
+    def compile(self, parsed):
+        clauses = self.split_clauses(self.tokens(parsed))
+        condition = parse_conditions(clauses.get("condition", ()), self.condition_keywords)
+        if parsed.best:
+            condition += (('growth', True, None), ('market cap', False, None))
+        if parsed.to_the_moon:
+            condition += (('growth', True, None), ('cash', True, None))
+        return QueryPlan(
+            text=tuple(clauses.get("text", ())),
+            condition=condition,
+            location=tuple(clauses.get("location", ())),
+            leadership=tuple(" ".join(part) for part in split_on(clauses.get("leadership", ()), "and") if part),
+            ranking=parse_ranking(clauses["ranking"], self.condition_keywords) if "ranking" in clauses else (),
+            launching=tuple(clauses.get("launching", ())),
+            )
@@ -0,0 +1,61 @@
+import numpy as np
+
+
+class SearchResult:
+    """ one result of a page: ticker, raw text score and its display fields """
+    __slots__ = ("symbol", "score", "fields")
+
+    def __init__(self, symbol, score, fields):
+        self.symbol = symbol
+        self.score = score
+        self.fields = fields
+
+    def __repr__(self):
+        return f"SearchResult({self.symbol!r}, {self.score!r}, {self.fields!r})"
+
+
+def top_k(candidates, key, k=None):
+    """ the k candidates with the highest key, in descending key order
+
+        identical to candidates[np.argsort(-key[candidates], kind="stable")][:k] (ties keep the
+        candidate order) but only the k selected candidates get sorted, via np.partition
+    """
+    candidates = np.asarray(candidates, dtype=np.int64)
+    neg = -np.asarray(key)[candidates]
+    if k is not None and k < len(candidates):
+        if k <= 0:
+            return candidates[:0]
+        kth = np.partition(neg, k - 1)[k - 1]
+        keep = neg < kth
+        """ ties at the k-th value: the first ones in candidate order """
+        ties = np.flatnonzero(neg == kth)[:k - int(keep.sum())]
+        keep[ties] = True
+        candidates = candidates[keep]
+        neg = neg[keep]
+    return candidates[np.argsort(neg, kind="stable")]
+
+
+def ranked_page(candidates, key, group, offset=0, limit=None):
+    """ one page of the ranking, keeping only the first document of every group (ticker)
+
+        candidates: doc ids in tie-break order, key: per doc sort key (descending),
+        group: per doc group code. returns (page doc ids, number of distinct groups)
+    """
+    candidates = np.asarray(candidates, dtype=np.int64)
+    group = np.asarray(group)
+    total = len(np.unique(group[candidates]))
+    if limit is None:
+        need = None
+    else:
+        need = offset + limit
+    k = need
+    while True:
+        order = top_k(candidates, key, k)
+        _, first = np.unique(group[order], return_index=True)
+        firsts = order[np.sort(first)]
+        if need is None or len(firsts) >= need or k >= len(candidates):
+            break
+        """ duplicated groups pushed some documents out of the page, widen the selection """
+        k = min(len(candidates), k + need - len(firsts))
+    stop = None if limit is None else offset + limit
+    return firsts[offset:stop], total
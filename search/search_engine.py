@@ -0,0 +1,363 @@
+"""
+the build and query path shared by the equity and crypto engines
+
+an engine subclass only describes its data: text fields and weights, condition keywords,
+query grammar, symbol / name columns, filter fields and how its tables are loaded. tokenizing,
+indexing, snapshots, typeahead, spelling correction, query planning, filtering, ranking and
+result pages are the same for both and live here
+"""
+import nltk, re, pandas as pd, sys
+import logging
+from nltk.corpus import stopwords
+import numpy as np
+try:
+    from .inverted_index import InvertedIndex, SCORING_MODES
+    from .numeric_filter import NumericFilter
+    from .index_snapshot import write_engine_snapshot, read_engine_snapshot, compact_engine, build_display_columns
+    from .ranking import ranked_page, SearchResult
+    from .column_store import ColumnStore
+    from .token_postings import TokenPostings, clause_docs
+    from .prefix_index import PrefixIndex
+    from .spell_index import SpellIndex
+    from .query_parser import QueryGrammar, parse_query
+    from .keyword_automaton import compile_keywords
+    from .query_cache import QueryCache, normalize_query, dataset_version
+    from .incremental import TokenReuse, text_hash
+    from .token_normalizer import shared_normalizer
+    from .parallel_build import tokenize_rows, build_inverted_index, resolve_workers, make_pool
+except ImportError:
+    from inverted_index import InvertedIndex, SCORING_MODES
+    from numeric_filter import NumericFilter
+    from index_snapshot import write_engine_snapshot, read_engine_snapshot, compact_engine, build_display_columns
+    from ranking import ranked_page, SearchResult
+    from column_store import ColumnStore
+    from token_postings import TokenPostings, clause_docs
+    from prefix_index import PrefixIndex
+    from spell_index import SpellIndex
+    from query_parser import QueryGrammar, parse_query
+    from keyword_automaton import compile_keywords
+    from query_cache import QueryCache, normalize_query, dataset_version
+    from incremental import TokenReuse, text_hash
+    from token_normalizer import shared_normalizer
+    from parallel_build import tokenize_rows, build_inverted_index, resolve_workers, make_pool
+
+logger = logging.getLogger(__name__)
+
+
+class SearchEngine:
+    """ base of IllumentiSearch and IllumentiCryptoSearch
+
+        a subclass sets engine_name, then in __init__ its schema (text_fields, field_weights,
+        default_ranking, map_from_keyword_to_field_raw, screened_words, clause_keywords,
+        phrase_rewrites, display_labels, symbol_field, name_field, snapshot_text_columns,
+        filter_fields) and calls compile_grammar(). load_dataset fills self.dataset
+    """
+    """ snapshot kind, see index_snapshot.py """
+    engine_name = None
+
+    def __init__(self):
+        self.index = InvertedIndex()
+        self.numeric_filter = NumericFilter({})
+        """ numeric field -> display string per doc, result fields are looked up rather than formatted per query """
+        self.display_columns = {}
+        self.dataset = None
+        """ the columns the query path reads (see column_store.py), self.dataset is only used to build """
+        self.store = ColumnStore({})
+        self.dataset_version = None
+        self.query_cache = QueryCache()
+        self.text_hashes = None
+        self.doc_tokens = None
+        self.suggest_index = PrefixIndex()
+        self.spell_index = SpellIndex()
+        """ replace query terms the index does not know with the closest known term """
+        self.correct_spelling = True
+        """ ranking of the text matches when a query does not ask for one: "tfidf" or "bm25" (BM25F) """
+        self.scoring = "tfidf"
+        """ order of the results when a query has no "ranked by": (keyword, descending), None for the text score """
+        self.default_ranking = None
+        """ result field names of stemmed condition keywords (the first raw keyword of the phrase when not listed) """
+        self.display_labels = {}
+        self.phrase_rewrites = ()
+        self.filter_postings = {}
+        """ digits of the text score shown with every result """
+        self.score_digits = 5
+        self.stemmer = nltk.stem.PorterStemmer()
+        """ get english stop words, remove non-alphanumeric """
+        sws = stopwords.words('english')
+        sws = [re.sub(r'[^a-zA-Z\d\s:]', '', sw) for sw in sws]
+        self.set_sws = set()
+        for sw in sws:
+            self.set_sws.add(self.stemmer.stem(sw.lower()))
+        self.normalizer = shared_normalizer(self.set_sws)
+
+    def compile_grammar(self):
+        """ condition keywords tokenized like the queries and compiled once into one automaton (keyword_automaton.py):
+            stemmed phrase -> field, result field names default to the first raw keyword of a phrase """
+        self.keywords, self.map_from_keyword_to_field, keyword_labels = compile_keywords(self.map_from_keyword_to_field_raw, self.normalizer)
+        self.display_labels = {**keyword_labels, **self.display_labels}
+        self.grammar = QueryGrammar(self.screened_words, self.clause_keywords, self.phrase_rewrites, self.keywords)
+        """ text field of each location / leadership clause, its tokens are also indexed on their own (token -> docs) """
+        self.filter_text_fields = list(self.filter_fields.values())
+
+    def loaded_text_columns(self):
+        """ the text columns read from the tables: the indexed fields and the columns kept for results """
+        return list(dict.fromkeys(list(self.text_fields) + self.snapshot_text_columns))
+
+    def search_columns(self):
+        """ (text columns, numeric columns) read from the exported tables, the search artifact keeps only these """
+        return self.loaded_text_columns(), list(dict.fromkeys(self.map_from_keyword_to_field.values()))
+
+    def tokenize_all_words(self, previous=None, workers=1, pool=None):
+        """ tokenize every text field of every row.
+            previous: the engine of the last build (e.g. loaded from its snapshot), rows whose
+            text fields are unchanged reuse its tokens instead of being tokenized again.
+            the remaining rows are tokenized in `pool` when workers > 1 """
+        print("tokenize all words ... process rows:")
+        reuse = TokenReuse(previous)
+        n = len(self.dataset)
+        fields = list(self.text_fields)
+        doc_tokens = [None] * n
+        text_hashes = np.zeros(n, dtype=np.uint64)
+        todo_rows = []
+        todo = []
+        for i in range(n):
+            if i % 500 == 0:
+                sys.stdout.write(str(i) + ",")
+            values = [str(self.dataset[field][i]) for field in fields]
+            h = text_hash(values)
+            text_hashes[i] = h
+            reused = reuse.get(h)
+            if reused is not None:
+                doc_tokens[i] = reused
+                continue
+            todo_rows.append(i)
+            todo.append(values)
+        for i, fields_tokens in zip(todo_rows, tokenize_rows(self.normalizer, todo, workers, pool)):
+            doc_tokens[i] = fields_tokens
+        self.text_hashes = text_hashes
+        self.doc_tokens = doc_tokens
+        print(f"\ndone, {len(todo)} rows tokenized, {reuse.reused} reused")
+
+    def tokenize_string(self, string, with_rm_stopwords = True):
+        """ tokenize to only alphanumeric, lower case and stemming, optionally remove stop words
+            (memoized across both engines, see token_normalizer.py) """
+        return self.normalizer.tokenize(string, with_rm_stopwords)
+
+    def map_tickers_to_index(self):
+        symbols = self.store[self.symbol_field]
+        self.tickers_to_index_map = {ticker: i for i, ticker in enumerate(symbols)}
+        """ per doc: ticker code (duplicated tickers share one) and the row the ticker map points at """
+        self.ticker_codes = pd.factorize(symbols)[0]
+        self.ticker_rows = np.array([self.tickers_to_index_map[ticker] for ticker in symbols], dtype=np.int64)
+
+    def build_index(self, previous=None, workers=None):
+        """ previous: optional engine of the last build, see tokenize_all_words.
+            workers: processes for tokenization and postings (None or 1: serial, 0: one per cpu) """
+        workers = resolve_workers(workers)
+        pool = make_pool(self.normalizer, workers) if workers > 1 else None
+        try:
+            self.tokenize_all_words(previous, workers, pool)
+            print("building index ... ")
+            field_weights = [self.field_weights.get(field, 1.0) for field in self.text_fields]
+            self.index = build_inverted_index(self.doc_tokens, field_weights, workers, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.spell_index = SpellIndex.build(self.index.vocab_list(), self.index.df)
+        self.numeric_filter = NumericFilter.from_dataset(self.dataset, self.map_from_keyword_to_field.values())
+        self.store = ColumnStore.from_dataset(self.dataset, self.snapshot_text_columns, self.numeric_filter.columns)
+        self.build_filter_postings()
+        self.map_tickers_to_index()
+        self.display_columns = build_display_columns(self.numeric_filter)
+        self.build_suggest_index()
+        self.query_cache.invalidate(self.dataset_version)
+        print(f"done, {len(self.index)} terms, {len(self.index.doc_ids)} postings")
+
+    def build_filter_postings(self):
+        """ token -> docs of every filter field, from the rows' tokens """
+        fields = list(self.text_fields)
+        self.filter_postings = {field: TokenPostings.build(fields_tokens[fields.index(field)] for fields_tokens in self.doc_tokens)
+                                for field in self.filter_text_fields}
+
+    def build_suggest_index(self):
+        """ typeahead over symbols and names, ranked by market cap """
+        market_cap = self.numeric_filter.columns[self.map_from_keyword_to_field["market cap"]][self.ticker_rows]
+        self.suggest_index = PrefixIndex.build(self.store[self.symbol_field], self.store[self.name_field], market_cap, self.ticker_codes)
+
+    def suggest(self, prefix, limit=10):
+        """ the top tickers whose symbol or a word of their name starts with prefix: symbol and whole name
+            matches (lead) first, each group largest market cap first """
+        market_cap = self.numeric_filter.columns[self.map_from_keyword_to_field["market cap"]]
+        symbols = self.store[self.symbol_field]
+        names = self.store[self.name_field]
+        res = []
+        for ind, lead in self.suggest_index.matches(prefix, limit):
+            cap = market_cap[self.ticker_rows[ind]]
+            res.append({"symbol": symbols[ind], "name": names[ind].strip(),
+                        "market_cap": None if np.isnan(cap) else float(cap), "lead": lead})
+        return res
+
+    def compact(self):
+        """ keep only what the query path reads, so preloaded pages stay shared after fork """
+        compact_engine(self)
+
+    def save_snapshot(self, path, sources=()):
+        """ write the built index to a versioned snapshot directory (see index_snapshot.py) """
+        write_engine_snapshot(self, path, self.engine_name, sources)
+
+    def load_snapshot(self, path, sources=None):
+        """ load a snapshot instead of load_dataset + build_index, sources are checked for staleness """
+        snap = read_engine_snapshot(self, path, self.engine_name, sources)
+        self.dataset_version = dataset_version(snap.manifest["sources"])
+        self.build_suggest_index()
+        self.query_cache.invalidate(self.dataset_version)
+        print(f"loaded {self.engine_name} snapshot {path}: {len(self.store)} rows, {len(self.index)} terms")
+
+    def query(self, Q, limit=None, offset=0, scoring=None):
+        return self.query_page(Q, limit, offset, scoring)[0]
+
+    def query_page(self, Q, limit=None, offset=0, scoring=None):
+        """ one page (offset, limit) of the results and the total number of matching tickers,
+            served from the query cache when the same normalized query was answered before.
+            scoring: "tfidf" or "bm25", None for the engine's default """
+        if not Q:
+            return None, 0
+        scoring = self.check_scoring(scoring)
+        Q = normalize_query(Q)
+        key = (Q, limit, offset, scoring)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        res = self.execute_query(parse_query(Q, self.normalizer), limit, offset, scoring)
+        self.query_cache.put(key, res)
+        return res
+
+    def ranked_results(self, parsed, n=None, scoring=None):
+        """ the first n results by raw text score, for merging with other engines (see multi_search.py), the ranking
+            field only breaks ties: ([SearchResult], the query's score bound, number of matching tickers) """
+        scoring = self.check_scoring(scoring)
+        key = ("ranked", parsed.text, n, scoring)
+        cached = self.query_cache.get(key)
+        if cached is not None:
+            return cached
+        page_indices, scores, total, Q_dataclass, bound = self.rank_query(parsed, n, 0, scoring, by_score=True)
+        res = (self.result_records(page_indices, scores, Q_dataclass, scoring), bound, total)
+        self.query_cache.put(key, res)
+        return res
+
+    def check_scoring(self, scoring):
+        scoring = scoring or self.scoring
+        if scoring not in SCORING_MODES:
+            raise ValueError(f"unknown scoring {scoring!r}, expected one of {SCORING_MODES}")
+        return scoring
+
+    def execute_query(self, parsed, limit=None, offset=0, scoring="tfidf"):
+        """ plan, score, filter and rank, only the tickers of the page are ranked in full and formatted """
+        page_indices, scores, total, Q_dataclass, _ = self.rank_query(parsed, limit, offset, scoring)
+        return self.format_results(page_indices, scores, Q_dataclass, scoring), total
+
+    def rank_query(self, parsed, limit=None, offset=0, scoring="tfidf", by_score=False):
+        """ (page doc ids, text scores of all docs, number of matching tickers, QueryPlan, score bound of the text terms)
+            by_score: rank by text score even with a ranking field, see ranked_page """
+        Q_dataclass = self.query_understand(parsed)
+        logger.debug("query plan: %s", Q_dataclass)
+
+        """ text tokens come out of the plan already lower cased and stemmed """
+        terms = self.correct_terms(Q_dataclass.text)
+        scores = self.index.score(terms, scoring=scoring)
+        if terms:
+            indices = np.flatnonzero(scores > 0).tolist()
+            logger.debug("%d text matches", len(indices))
+        else:
+            """ no text terms: the conditions select from every document, straight off the range indexes """
+            indices = None
+        new_indices = np.asarray(self.filter_with_query_criteria(indices, Q_dataclass), dtype=np.int64)
+
+        page_indices, total = self.ranked_page(new_indices, scores, Q_dataclass, offset, limit, by_score)
+        return page_indices, scores, total, Q_dataclass, self.index.score_bound(terms, scoring)
+
+    def ranked_page(self, indices, scores, Q_dataclass, offset=0, limit=None, by_score=False):
+        """ one page of the matching docs (one per ticker) by text score, or by the field of "ranked by" /
+            the engine's default ranking with the text score breaking the ties (the other way round with by_score) """
+        ranking = self.ranking_field(Q_dataclass)
+        if ranking is None:
+            return ranked_page(indices, scores, self.ticker_codes, offset, limit)
+        field, descending = ranking
+        """ a gather of the field's precomputed rank positions, values taken from the ticker's row """
+        key = self.numeric_filter.rank_key(field, descending)[self.ticker_rows]
+        primary, tie_break = (scores, key) if by_score else (key, scores)
+        sorted_indices = indices[np.argsort(-tie_break[indices], kind="stable")]
+        return ranked_page(sorted_indices, primary, self.ticker_codes, offset, limit)
+
+    def ranking_field(self, Q_dataclass):
+        """ (numeric field, descending) to order by, None for the text score """
+        for ranking in (Q_dataclass.ranking, self.default_ranking):
+            if not ranking:
+                continue
+            field = self.map_from_keyword_to_field.get(ranking[0])
+            if field in self.numeric_filter:
+                return field, ranking[1]
+            logger.debug("cannot rank by %s", ranking[0])
+        return None
+
+    def format_results(self, page_indices, scores, Q_dataclass, scoring="tfidf"):
+        """ ticker -> name, the values of the queried conditions and ranking field and the text score, in page order """
+        return {r.symbol: r.fields for r in self.result_records(page_indices, scores, Q_dataclass, scoring)}
+
+    def result_records(self, page_indices, scores, Q_dataclass, scoring="tfidf"):
+        """ a SearchResult per doc of the page, fields are lookups into the store and display columns """
+        res = []
+        symbols = self.store[self.symbol_field]
+        names = self.store[self.name_field]
+        score_label = 'bm25 score' if scoring == "bm25" else 'tf-idf score'
+        for ind in page_indices:
+            k = symbols[ind]
+            v = scores[ind]
+            name = names[ind].strip()
+            combined_dict = {" ":name}
+            for keyword in [cond[0] for cond in Q_dataclass.condition] + list(Q_dataclass.ranking[:1]):
+                field = self.map_from_keyword_to_field.get(keyword)
+                if field not in self.display_columns:
+                    continue
+                combined_dict[self.display_labels.get(keyword, keyword)] = self.display_columns[field][ind]
+            combined_dict[score_label] = f"{v:.{self.score_digits}f}"
+            self.add_result_fields(ind, combined_dict)
+            res.append(SearchResult(k, float(v), combined_dict))
+        return res
+
+    def add_result_fields(self, ind, fields):
+        """ fields every result of the engine shows besides the queried ones, none by default """
+
+    def correct_terms(self, terms):
+        """ misspelled text terms ("etherium", "microsft") -> the closest term of the index, see spell_index.py.
+            stop words stay in the plan's text but are never indexed, they are left as they are """
+        res = []
+        for term in terms:
+            if self.correct_spelling and term not in self.index and term not in self.normalizer.stop_stems:
+                corrected = self.spell_index.correct(term)
+                if corrected is not None:
+                    logger.debug("corrected %s -> %s", term, corrected)
+                    term = corrected
+            res.append(term)
+        return res
+
+    def filter_with_query_criteria(self, indices, Q_dataclass):
+        """ location / leadership: an intersection with the docs of the clause tokens, without text terms these are the candidates """
+        clause_matches = clause_docs(self.filter_postings, self.filter_fields, Q_dataclass)
+        if clause_matches is not None:
+            indices = clause_matches if indices is None else np.intersect1d(indices, clause_matches, assume_unique=True)
+        new_indices = self.filter_engine_clauses(indices, Q_dataclass)
+
+        #conditions
+        if len(Q_dataclass.condition) == 0:
+            return new_indices if new_indices is not None else []
+
+        return self.numeric_filter.apply(new_indices, Q_dataclass.condition, self.map_from_keyword_to_field)
+
+    def filter_engine_clauses(self, indices, Q_dataclass):
+        """ the clauses only one engine has (crypto: "launched in"), indices None stands for every document """
+        return indices
+
+    def query_understand(self, parsed):
+        """ this engine's QueryPlan of a parsed query, cached by the grammar """
+        return self.grammar.plan(parsed)
@@ -0,0 +1,136 @@
+"""
+spelling correction of query terms against the index vocabulary (symmetric delete, as in SymSpell)
+
+every vocabulary term is stored under each string it turns into when up to d characters are
+deleted. a query term within edit distance d of a vocabulary term shares at least one of those
+deletes, so the candidates are a handful of binary searches instead of a scan of the vocabulary.
+deletes are kept as 32 bit hashes in one sorted array (hash collisions only add candidates,
+every candidate is checked with the real edit distance)
+"""
+import zlib
+import numpy as np
+
+
+def deletes(term, distance):
+    """ term and every string left after deleting up to distance of its characters """
+    res = {term}
+    frontier = {term}
+    for _ in range(distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        res |= frontier
+    return res
+
+
+def delete_hash(s):
+    """ stable across processes, the arrays are stored in index snapshots """
+    return zlib.crc32(s.encode("utf-8"))
+
+
+def edit_distance(a, b, max_distance):
+    """ optimal string alignment distance (adjacent swaps count 1), max_distance + 1 once it is exceeded """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SpellIndex:
+    """ closest known term of a misspelled query term
+
+        terms shorter than min_length are never corrected (tickers, short words), longer ones
+        within edit distance 1, from long_length on within 2. among the closest terms the one
+        in the most documents wins
+    """
+    def __init__(self, min_length=4, long_length=8, max_candidates=256):
+        self.min_length = min_length
+        self.long_length = long_length
+        self.max_candidates = max_candidates
+        self.terms = []
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.hashes = np.zeros(0, dtype=np.uint32)
+        self.term_ids = np.zeros(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def max_distance(self, term):
+        if len(term) < self.min_length:
+            return 0
+        return 1 if len(term) < self.long_length else 2
+
+    @classmethod
+    def build(cls, terms, counts, **kwargs):
+        """ terms: the vocabulary (in term id order), counts: per term document frequency """
+        index = cls(**kwargs)
+        index.terms = list(terms)
+        index.counts = np.asarray(counts, dtype=np.int64)
+        hashes, term_ids = [], []
+        for t, term in enumerate(index.terms):
+            """ a query term of long_length is within 2 of terms down to long_length - 2 characters """
+            if len(term) >= index.long_length - 2:
+                distance = 2
+            elif len(term) >= index.min_length - 1:
+                distance = 1
+            else:
+                continue
+            for w in deletes(term, distance):
+                hashes.append(delete_hash(w))
+                term_ids.append(t)
+        hashes = np.asarray(hashes, dtype=np.uint32)
+        order = np.argsort(hashes, kind="stable")
+        index.hashes = hashes[order]
+        index.term_ids = np.asarray(term_ids, dtype=np.int32)[order]
+        return index
+
+    @classmethod
+    def from_arrays(cls, terms, counts, hashes, term_ids):
+        """ wrap the arrays of a snapshot """
+        index = cls()
+        index.terms = list(terms)
+        index.counts = counts
+        index.hashes = hashes
+        index.term_ids = term_ids
+        return index
+
+    def to_arrays(self):
+        return {"hashes": self.hashes, "term_ids": self.term_ids}
+
+    def candidates(self, term):
+        """ (distance, term id) of the vocabulary terms within the allowed distance, closest and most frequent first """
+        distance = self.max_distance(term)
+        if not distance or not len(self.hashes):
+            return []
+        keys = np.fromiter((delete_hash(w) for w in deletes(term, distance)), dtype=np.uint32)
+        lo = np.searchsorted(self.hashes, keys, side="left")
+        hi = np.searchsorted(self.hashes, keys, side="right")
+        if not (hi > lo).any():
+            return []
+        ids = np.unique(np.concatenate([self.term_ids[l:h] for l, h in zip(lo, hi) if h > l]))
+        if len(ids) > self.max_candidates:
+            """ bounded work per term: only the most frequent candidates are checked """
+            ids = ids[np.argsort(-self.counts[ids], kind="stable")[:self.max_candidates]]
+        res = []
+        for t in ids.tolist():
+            d = edit_distance(term, self.terms[t], distance)
+            if d <= distance:
+                res.append((d, -int(self.counts[t]), t))
+        res.sort()
+        return [(d, t) for d, _, t in res]
+
+    def correct(self, term):
+        """ the closest known term, None when there is none within the allowed distance """
+        candidates = self.candidates(term)
+        if not candidates:
+            return None
+        return self.terms[candidates[0][1]]
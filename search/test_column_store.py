@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from column_store import ColumnStore
+from ranking import SearchResult
+
+def test_store_from_dataset():
+    dataset = pd.DataFrame({"Symbol": ["AAPL", "MSFT"], "Name": ["Apple", "Microsoft"], "other": [1, 2]})
+    price = np.array([190.5, np.nan])
+    store = ColumnStore.from_dataset(dataset, ["Symbol", "Name"], {"price__profile": price})
+    assert len(store) == 2 and "other" not in store
+    assert store["Symbol"][1] == "MSFT" and isinstance(store["Symbol"], np.ndarray)
+    """ numeric columns are shared with the numeric filter, not copied """
+    assert store["price__profile"] is price
+    """ equal strings are one object """
+    other = ColumnStore.build({"Symbol": ["".join(["AA", "PL"])]}, {})
+    assert other["Symbol"][0] is store["Symbol"][0]
+
+def test_search_result_has_no_dict():
+    r = SearchResult("AAPL", 1.5, {" ": "Apple"})
+    assert not hasattr(r, "__dict__")
+    assert (r.symbol, r.score, r.fields) == ("AAPL", 1.5, {" ": "Apple"})
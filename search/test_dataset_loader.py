@@ -0,0 +1,69 @@
+import os
+import numpy as np
+import pandas as pd
+from dataset_loader import read_table, read_tables, extract_number, write_artifact, read_artifact, search_source
+
+def test_typed_columns_and_sentinel(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text(",Symbol,Name,derived__debtRatio,pe__quote,image__profile\n"
+                    "0,AAPL,Apple,0.5,30.1,a.png\n"
+                    "1,XYZ,Xyz,__nan__,__nan__,b.png\n")
+    table = read_table(str(path), ["Symbol", "Name", "ceo__profile"], ["derived__debtRatio", "pe__quote"])
+    """ only the asked columns that exist, numerics as float64 with the sentinel as NaN """
+    assert list(table.columns) == ["Symbol", "Name", "derived__debtRatio", "pe__quote"]
+    assert table["derived__debtRatio"].dtype == np.float64
+    assert table["derived__debtRatio"].tolist()[0] == 0.5 and np.isnan(table["pe__quote"][1])
+    both = read_tables([str(path), str(path)], ["Symbol"], ["pe__quote"])
+    assert both.index.tolist() == [0, 1, 2, 3]
+
+def test_extract_number():
+    descriptions = pd.Series(["Bitcoin launched in 2010. trading on 11856 active market(s)", "no dates", np.nan])
+    years = extract_number(descriptions, r"launched in (\d{4})")
+    assert years.dtype == np.float64 and years[0] == 2010.0 and np.isnan(years[1:]).all()
+    assert extract_number(descriptions, r"([0-9]+) active market\(s\)")[0] == 11856.0
+
+def test_artifact_round_trip(tmp_path):
+    table = pd.DataFrame({"Symbol": ["AAPL", "NESTLÉ", np.nan], "Name": ["Apple", "__nan__", "Xyz"],
+                          "pe__quote": [30.1, "__nan__", "4"], "image__profile": ["a.png", "b.png", "c.png"]})
+    path = str(tmp_path / "table.npz")
+    write_artifact(path, table, ["Symbol", "Name", "ceo__profile"], ["pe__quote"])
+    """ only the search columns are written, missing text stays missing, numerics are float64 """
+    loaded = read_table(path, ["Symbol", "Name"], ["pe__quote"])
+    assert list(loaded.columns) == ["Symbol", "Name", "pe__quote"]
+    assert loaded["Symbol"].tolist()[:2] == ["AAPL", "NESTLÉ"] and pd.isna(loaded["Symbol"][2])
+    assert pd.isna(loaded["Name"][1]) and loaded["Name"][2] == "Xyz"
+    assert loaded["pe__quote"].dtype == np.float64 and np.isnan(loaded["pe__quote"][1]) and loaded["pe__quote"][2] == 4.0
+    assert list(read_artifact(path).columns) == ["Symbol", "Name", "pe__quote"]
+    assert read_tables([path, path], ["Symbol"], []).index.tolist() == list(range(6))
+
+def test_artifact_matches_csv(tmp_path):
+    csv_path = tmp_path / "table.csv"
+    csv_path.write_text(",Symbol,Name,pe__quote,image__profile\n0,AAPL,Apple,30.1,a.png\n1,XYZ,,__nan__,b.png\n")
+    text, numeric = ["Symbol", "Name"], ["pe__quote"]
+    from_csv = read_table(str(csv_path), text, numeric)
+    assert search_source(str(csv_path)) == str(csv_path)
+    write_artifact(str(tmp_path / "table.npz"), from_csv, text, numeric)
+    """ the engines pick the artifact next to the csv once it exists """
+    artifact_path = search_source(str(csv_path))
+    assert artifact_path == str(tmp_path / "table.npz")
+    pd.testing.assert_frame_equal(read_table(artifact_path, text, numeric), from_csv)
+    """ a csv rewritten after its artifact is read instead of the stale artifact """
+    os.utime(csv_path, ns=(os.stat(artifact_path).st_mtime_ns + 10**9,) * 2)
+    assert search_source(str(csv_path)) == str(csv_path)
+
+def test_search_columns_come_from_the_engines(tmp_path):
+    from compile_index import engine_classes, search_columns
+    assert sorted(engine_classes) == ["crypto", "equity"]
+    for name, engine_class in engine_classes.items():
+        search = engine_class()
+        text, numeric = search_columns(name)
+        assert text == search.loaded_text_columns()
+        assert set(numeric) == set(search.map_from_keyword_to_field.values())
+    """ fields an engine derives after loading (crypto launch year) are not in the tables and are skipped """
+    path = tmp_path / "crypto.csv"
+    path.write_text(",symbol,name,category,description,market_cap\n0,BTC,Bitcoin,coin,Launched in 2009,1e12\n")
+    text, numeric = search_columns("crypto")
+    artifact = str(tmp_path / "crypto.npz")
+    write_artifact(artifact, read_table(str(path), text, numeric), text, numeric)
+    table = read_table(artifact, text, numeric)
+    assert "launch_year" not in table and table["market_cap"].tolist() == [1e12]
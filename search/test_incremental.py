@@ -0,0 +1,20 @@
+import numpy as np
+from types import SimpleNamespace
+from incremental import TokenReuse, text_hash, join_fields_tokens
+from index_snapshot import StringColumn, encode_strings
+
+def test_text_hash_separates_fields():
+    assert text_hash(["ab", "c"]) != text_hash(["a", "bc"])
+    assert text_hash(["AAPL", "Apple"]) == text_hash(["AAPL", "Apple"])
+
+def test_reuse_by_text_hash():
+    previous = SimpleNamespace(
+        text_hashes=np.array([text_hash(["a"]), text_hash(["b"])], dtype=np.uint64),
+        doc_tokens=StringColumn(*encode_strings([join_fields_tokens([["tok"], ["a"]]),
+                                                 join_fields_tokens([["tok"], [], ["b", "c"]])])))
+    reuse = TokenReuse(previous)
+    assert reuse.get(text_hash(["b"])) == [["tok"], [], ["b", "c"]]
+    assert reuse.get(text_hash(["c"])) is None
+    assert reuse.reused == 1
+    """ an engine without per-row tokens (e.g. never built) reuses nothing """
+    assert len(TokenReuse(SimpleNamespace(text_hashes=None, doc_tokens=None))) == 0
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from index_snapshot import StringColumn, encode_strings, write_snapshot, read_snapshot, source_fingerprint, SnapshotError
+
+def test_string_column_roundtrip():
+    values = ["AAPL", "", "Nestlé S.A.", "tech gpu"]
+    col = StringColumn(*encode_strings(values))
+    assert len(col) == 4
+    assert col[2] == "Nestlé S.A."
+    assert col.tolist() == values
+
+def test_snapshot_is_memory_mapped_and_versioned(tmp_path):
+    src = tmp_path / "table.csv"
+    src.write_text("Symbol\nAAPL\n")
+    path = str(tmp_path / "snap")
+    write_snapshot(path, {"x": np.arange(5, dtype=np.int32)}, {"names": ["a", "b"]},
+                   {"engine": "equity", "sources": source_fingerprint([str(src)])})
+    snap = read_snapshot(path, engine="equity", sources=[str(src)])
+    assert isinstance(snap.arrays["x"], np.memmap)
+    assert snap.strings["names"].tolist() == ["a", "b"]
+    with pytest.raises(SnapshotError):
+        read_snapshot(path, engine="crypto")
+    src.write_text("Symbol\nAAPL\nMSFT\n")
+    with pytest.raises(SnapshotError):
+        read_snapshot(path, sources=[str(src)])
@@ -0,0 +1,86 @@
+import numpy as np
+from inverted_index import InvertedIndex, partial_postings
+
+""" per document: symbol tokens, description tokens """
+docs = [
+    [["appl"], ["iphon", "mac", "appl"]],
+    [["msft"], ["microsoft", "window", "cloud"]],
+    [[], []],
+    [["nvda"], ["cloud", "gpu", "cloud", "cloud"]],
+]
+field_weights = [5.0, 1.0]
+
+def test_build_csr_layout():
+    index = InvertedIndex().build(docs, field_weights)
+    assert index.n_docs == 4
+    assert len(index.offsets) == len(index) + 1
+    assert index.doc_ids.dtype == np.int32 and index.weights.dtype == np.float32
+    assert index.field_lengths.tolist() == [[1, 3], [1, 3], [0, 0], [1, 4]]
+    doc_ids, weights = index.postings("cloud")
+    assert doc_ids.tolist() == [1, 3]
+    """ field weight * tf / weighted doc length * 1 / df """
+    assert np.allclose(weights, [1.0 / 8 / 2, 3.0 / 9 / 2])
+    """ "appl" is in two fields of doc 0 but counts once for df """
+    assert index.df[index.term_id("appl")] == 1
+    assert index.postings("appl")[0].tolist() == [0, 0]
+
+def test_field_weights_match_duplicated_fields():
+    """ a field weight of 5 scores exactly like a field repeated five times """
+    repeated = InvertedIndex().build([[symbol * 5 + description] for symbol, description in docs], [1.0])
+    weighted = InvertedIndex().build(docs, field_weights)
+    for query in (["appl"], ["cloud", "gpu", "unknown"], ["msft", "cloud"]):
+        assert np.allclose(weighted.score(query), repeated.score(query))
+    """ other weights at query time without a rebuild """
+    assert np.allclose(weighted.score(["appl"], field_weights=[1.0, 1.0]), [2.0 / 4, 0, 0, 0])
+
+def test_score_accumulates_query_terms():
+    index = InvertedIndex().build(docs, field_weights)
+    scores = index.score(["cloud", "gpu", "unknown"])
+    assert scores.shape == (4,)
+    assert np.flatnonzero(scores).tolist() == [1, 3]
+    assert np.isclose(scores[3], 3.0 / 9 / 2 + 1.0 / 9)
+
+def test_merged_partials_match_single_build():
+    from parallel_build import chunks
+    whole = InvertedIndex().build(docs, field_weights)
+    for n in (1, 2, 3, 4):
+        merged = InvertedIndex().merge([partial_postings(part, 2) for part in chunks(docs, n)], field_weights)
+        assert merged.vocab == whole.vocab and merged.n_docs == whole.n_docs
+        for k, v in whole.to_arrays().items():
+            assert np.array_equal(merged.to_arrays()[k], v)
+
+def test_bm25_matches_reference_formula():
+    index = InvertedIndex(k1=1.2, b=0.75).build(docs, field_weights)
+    lengths = np.array([[1, 3], [1, 3], [0, 0], [1, 4]], dtype=float)
+    avg = lengths.mean(axis=0)
+    def reference(doc, token):
+        tf = sum(field_weights[f] * fields.count(token) / (1 - 0.75 + 0.75 * lengths[doc, f] / avg[f])
+                 for f, fields in enumerate(docs[doc]))
+        df = sum(any(token in fields for fields in d) for d in docs)
+        idf = np.log(1 + (4 - df + 0.5) / (df + 0.5))
+        return idf * tf * 2.2 / (tf + 1.2) if tf else 0.0
+    for query in (["appl"], ["cloud", "gpu", "unknown"], ["msft", "cloud"]):
+        expected = [sum(reference(d, token) for token in query) for d in range(4)]
+        assert np.allclose(index.score(query, scoring="bm25"), expected, rtol=1e-6)
+        """ the same scores re-derived at query time from explicit field weights """
+        assert np.allclose(index.score(query, field_weights=field_weights, scoring="bm25"), expected, rtol=1e-6)
+    """ term frequency saturates: 3 x "cloud" in a longer doc is less than 3 x the single occurrence """
+    scores = index.score(["cloud"], scoring="bm25")
+    assert scores[1] < scores[3] < 3 * scores[1]
+
+def test_score_bound():
+    index = InvertedIndex().build(docs, field_weights)
+    """ 1 / df per token, an unknown token counts as df 0 """
+    assert np.isclose(index.score_bound(["cloud", "gpu", "unknown"]), 1.0 / 2 + 1.0 + 1.0)
+    assert np.isclose(index.score_bound(["cloud"], scoring="bm25"), np.log(1 + 2.5 / 2.5) * 2.2)
+    """ a document made of the query token alone reaches it """
+    single = InvertedIndex().build([[["gpu"], []], [["cloud"], ["cpu"]]], field_weights)
+    assert np.isclose(single.score(["gpu"])[0], single.score_bound(["gpu"]))
+    for scoring in ("tfidf", "bm25"):
+        for query in (["appl"], ["cloud", "gpu", "unknown"], ["msft", "cloud"]):
+            assert index.score(query, scoring=scoring).max() <= index.score_bound(query, scoring=scoring)
+
+def test_unknown_scoring_mode():
+    import pytest
+    with pytest.raises(ValueError):
+        InvertedIndex().build(docs, field_weights).score(["cloud"], scoring="pagerank")
@@ -0,0 +1,32 @@
+from keyword_automaton import KeywordAutomaton, compile_keywords
+from token_normalizer import TokenNormalizer
+
+def automaton(*phrases):
+    return KeywordAutomaton([(tuple(phrase.split()), phrase) for phrase in phrases])
+
+def test_leftmost_longest():
+    keywords = automaton("price", "price earn ratio", "earn", "earn growth", "ratio")
+    assert keywords.matches("high price earn ratio".split()) == [(1, 4, "price earn ratio")]
+    """ a phrase cut short falls back to its shorter phrases """
+    assert keywords.matches("price earn growth".split()) == [(0, 1, "price"), (1, 3, "earn growth")]
+    assert keywords.matches("low debt".split()) == []
+    assert keywords.first("abov 3 ratio and price".split()) == "ratio"
+    assert keywords.first([]) is None
+
+def test_overlapping_phrases():
+    """ a failure link into the middle of another phrase """
+    keywords = automaton("24 hour volum", "hour", "volum")
+    assert keywords.matches("24 hour volum".split()) == [(0, 3, "24 hour volum")]
+    assert keywords.matches("24 24 hour volum".split()) == [(1, 4, "24 hour volum")]
+    assert keywords.matches("24 hour and volum".split()) == [(1, 2, "hour"), (3, 4, "volum")]
+    assert len(automaton()) == 0
+
+def test_compile_keywords():
+    raw = {"pe": "pe__quote", "price earnings ratio": "pe__quote", "price to earnings ratio": "pe__quote",
+           "transaction frequency": "transaction_frequency", "earnings growth": "growth", "earning growth": "growth"}
+    keywords, fields, labels = compile_keywords(raw, TokenNormalizer(frozenset()))
+    assert fields["price earn ratio"] == "pe__quote" and fields["transact frequenc"] == "transaction_frequency"
+    """ stop words are kept, a phrase spelled twice keeps its first raw keyword as label """
+    assert fields["price to earn ratio"] == "pe__quote"
+    assert labels["earn growth"] == "earnings growth"
+    assert keywords.first(TokenNormalizer(frozenset()).tokenize("high earning growth", with_rm_stopwords=False)) == "earn growth"
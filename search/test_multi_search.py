@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multi_search import merge_ranked, search_all
+from ranking import SearchResult
+from token_normalizer import TokenNormalizer
+
+def records(*items):
+    return [SearchResult(*item) for item in items]
+
+def test_merge_by_score_over_the_query_bound():
+    results = {
+        "equity": (records(("A", 4.0, {}), ("B", 2.0, {}), ("C", 1.0, {})), 8.0, 3),
+        "crypto": (records(("X", 1.5, {"market cap": "1 bn"}), ("Y", 0.5, {})), 2.0, 2),
+    }
+    page = merge_ranked(results)
+    assert [(r["symbol"], r["type"], r["score"]) for r in page] == [
+        ("X", "crypto", 0.75), ("A", "equity", 0.5), ("B", "equity", 0.25), ("Y", "crypto", 0.25), ("C", "equity", 0.125)]
+    assert page[0]["market cap"] == "1 bn"
+    """ pages are slices of the same merge """
+    assert merge_ranked(results, offset=1, limit=2) == page[1:3]
+
+def test_weak_best_match_is_not_promoted():
+    """ an engine's best hit is not 1 unless it matches the query as well as possible """
+    results = {"equity": (records(("LTBR", 0.1, {})), 1.0, 1), "crypto": (records(("ETH", 0.8, {})), 1.0, 1)}
+    assert [(r["symbol"], r["score"]) for r in merge_ranked(results)] == [("ETH", 0.8), ("LTBR", 0.1)]
+
+def test_merged_scores_do_not_increase():
+    results = {
+        "equity": (records(("A", 3.0, {}), ("B", 1.0, {}), ("C", 1.0, {})), 3.0, 3),
+        "crypto": (records(("X", 0.9, {}), ("Y", 1.7, {}), ("Z", 0.2, {})), 2.0, 3), # out of score order
+    }
+    scores = [r["score"] for r in merge_ranked(results)]
+    assert len(scores) == 6 and scores == sorted(scores, reverse=True)
+
+def test_merge_alternates_equal_scores():
+    results = {"equity": (records(("A", 0.0, {}), ("B", 0.0, {})), 0.0, 2), "crypto": (records(("X", 0.0, {}), ("Y", 0.0, {})), 0.0, 2)}
+    assert [r["symbol"] for r in merge_ranked(results)] == ["A", "X", "B", "Y"]
+
+class FakeEngine:
+    def __init__(self, items, delay=0.0, error=None):
+        self.normalizer = TokenNormalizer(frozenset())
+        self.items, self.delay, self.error = records(*items), delay, error
+    def ranked_results(self, parsed, n=None, scoring=None):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.items[:n], max([r.score for r in self.items] or [0.0]), len(self.items)
+
+def test_search_all_budget_and_failures():
+    executor = ThreadPoolExecutor(max_workers=3)
+    engines = {"equity": FakeEngine([("A", 2.0, {})]), "crypto": FakeEngine([("X", 1.0, {})], delay=0.5),
+               "other": FakeEngine([], error=RuntimeError("boom"))}
+    page, total, timed_out, failed = search_all(engines, "tech", executor, limit=10, budget=0.1)
+    assert [r["symbol"] for r in page] == ["A"]
+    assert total == 1 and timed_out == ["crypto"] and failed == ["other"]
+    page, total, timed_out, failed = search_all(engines, "tech", executor, limit=10)
+    assert [r["symbol"] for r in page] == ["A", "X"] and total == 2 and timed_out == []
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from numeric_filter import NumericFilter, partition_quantile, format_market_cap
+from index_snapshot import build_display_columns
+
+def test_partition_quantile_matches_pandas():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=101)
+    values[::7] = np.nan
+    for q in (0.25, 0.5, 0.75):
+        assert partition_quantile(values, q) == pd.Series(values).quantile(q)
+    assert np.isnan(partition_quantile(np.array([np.nan]), 0.75))
+
+def test_conditions_apply_in_order():
+    pe = np.array([5.0, 50.0, np.nan, 12.0, 30.0])
+    debt = np.array([0.1, 0.9, 0.2, 0.4, 0.3])
+    nf = NumericFilter({"pe__quote": pe, "derived__debtRatio": debt})
+    keywords = {"pe": "pe__quote", "debt ratio": "derived__debtRatio", "revenu": "revenue__income_statement"}
+    candidates = np.arange(5)
+    assert nf.apply(candidates, [["pe", True, 10.0]], keywords).tolist() == [1, 3, 4]
+    assert nf.apply(candidates, [["pe", True, 10.0], ["debt ratio", False, 0.5]], keywords).tolist() == [3, 4]
+    """ quantile over the surviving candidates, NaN never passes, unknown fields are skipped """
+    assert nf.apply(candidates, [["pe", True, None], ["revenu", True, 1.0]], keywords).tolist() == [1]
+
+def test_range_index_matches_scan():
+    rng = np.random.default_rng(1)
+    values = rng.normal(size=200)
+    values[::9] = np.nan
+    nf = NumericFilter({"pe__quote": values})
+    keywords = {"pe": "pe__quote"}
+    candidates = rng.permutation(200)[:80]
+    for higher in (True, False):
+        for thresh in (-1.0, 0.0, values[3], 2.5):
+            with np.errstate(invalid="ignore"):
+                scan = values > thresh if higher else values < thresh
+            assert nf.apply(candidates, [["pe", higher, thresh]], keywords).tolist() == candidates[scan[candidates]].tolist()
+            """ condition-only: no candidate set, the range index alone answers the query """
+            assert nf.apply(None, [["pe", higher, thresh]], keywords).tolist() == np.flatnonzero(scan).tolist()
+    assert nf.apply(None, [["pe", True, None]], keywords).tolist() == nf.apply(np.arange(200), [["pe", True, None]], keywords).tolist()
+    assert nf.apply(None, [], keywords).tolist() == []
+
+def test_rank_key_orders_like_a_sort():
+    cap = np.array([3.0, np.nan, 10.0, 3.0, 1.0])
+    nf = NumericFilter({"mktCap__profile": cap})
+    desc = nf.rank_key("mktCap__profile", descending=True)
+    asc = nf.rank_key("mktCap__profile", descending=False)
+    """ equal values share a rank, missing values are last either way """
+    assert desc.tolist() == [1, -1, 2, 1, 0]
+    assert asc.tolist() == [1, -1, 0, 1, 2]
+    candidates = np.array([4, 3, 1, 0, 2])
+    assert candidates[np.argsort(-desc[candidates], kind="stable")].tolist() == [2, 3, 0, 4, 1]
+    assert candidates[np.argsort(-asc[candidates], kind="stable")].tolist() == [4, 3, 0, 2, 1]
+
+def test_display_strings_match_per_query_formatting():
+    def old_format(v):
+        s = "{:.1f}".format(v)
+        if float(s) > 1000000000:
+            return "{:.1f}".format(float(s) / 1000000000.0) + " bn"
+        elif float(s) > 1000000:
+            return "{:.1f}".format(float(s) / 1000000.0) + " mm"
+        return s
+    values = np.array([0.04, 12.345, -3e9, 999999.96, 2.5e6, 7.25e11, np.nan])
+    display = build_display_columns(NumericFilter({"revenue__income_statement": values}))["revenue__income_statement"]
+    assert display.tolist() == [old_format(v) for v in values]
+    assert display[5] == "725.0 bn"
+    assert [format_market_cap(v) for v in (1.5e9, 2e6, 3500.0, 12.0)] == ["1.5 bn", "2.0 mm", "3.5 k", "12.0"]
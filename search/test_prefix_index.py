@@ -0,0 +1,32 @@
+import numpy as np
+from prefix_index import PrefixIndex
+
+symbols = ["AAPL", "AMZN", "CSCO", "KO", "APLE", "AAPL"]
+names = ["Apple Inc. Common Stock", "Amazon.com Inc. Common Stock", "Cisco Systems Inc. Common Stock",
+         "Coca-Cola Company (The) Common Stock", "Apple Hospitality REIT Inc. Common Stock", "Apple Inc. Duplicate"]
+market_cap = [3.6e12, 2.3e12, 2.4e11, 2.9e11, np.nan, 3.6e12]
+groups = [0, 1, 2, 3, 4, 0]
+
+def test_symbol_and_name_prefixes_ranked_by_market_cap():
+    index = PrefixIndex.build(symbols, names, market_cap, groups)
+    assert index.complete("a") == [0, 1, 4]
+    assert index.complete("APP") == [0, 4]
+    assert index.complete("  Apple   hosp") == [4]
+    assert index.complete("aapl") == [0]
+    assert index.complete("zzz") == []
+    assert index.complete("") == []
+    assert index.complete("a", limit=2) == [0, 1]
+
+def test_lead_keys_before_later_words():
+    index = PrefixIndex.build(symbols, names, market_cap, groups)
+    """ Coca-Cola and Cisco start with c, the bigger companies only have a later "Common" """
+    assert index.complete("c")[:2] == [3, 2]
+    assert index.complete("c", limit=5) == [3, 2, 0, 1, 4]
+    assert index.complete("inc") == [0, 1, 2, 4]
+    assert index.matches("c", limit=3) == [(3, True), (2, True), (0, False)]
+
+def test_long_prefixes_are_cut_like_the_keys():
+    index = PrefixIndex.build(["X"], ["a" * 40], [1.0], max_key=8)
+    assert index.complete("a" * 8) == [0]
+    assert index.complete("a" * 20) == [0]
+    assert index.complete("a" * 7 + "b") == []
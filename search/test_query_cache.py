@@ -0,0 +1,32 @@
+import time
+from query_cache import QueryCache, normalize_query
+
+def test_lru_ttl_and_counters():
+    cache = QueryCache(maxsize=2, ttl=60)
+    cache.invalidate("v1")
+    assert cache.get(("tech", None, 0)) is None
+    cache.put(("tech", None, 0), ({"AAPL": {}}, 1))
+    cache.put(("bitcoin", None, 0), ({"BTC": {}}, 1))
+    assert cache.get(("tech", None, 0)) == ({"AAPL": {}}, 1)
+    """ least recently used entry is evicted """
+    cache.put(("oil", None, 0), ({}, 0))
+    assert cache.get(("bitcoin", None, 0)) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 2)
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get(("tech", None, 0)) is None
+    assert normalize_query("  Best   Tech ") == "best tech"
+
+def test_shared_tier_and_invalidation(tmp_path):
+    a = QueryCache(shared_dir=str(tmp_path))
+    b = QueryCache(shared_dir=str(tmp_path))
+    a.invalidate("v1")
+    b.invalidate("v1")
+    a.put(("tech", None, 0), ({"AAPL": {}}, 1))
+    assert b.get(("tech", None, 0)) == ({"AAPL": {}}, 1)
+    assert b.stats()["shared_hits"] == 1
+    """ a reload moves on to a new version, old results are gone """
+    b.invalidate("v2")
+    assert b.get(("tech", None, 0)) is None
+    assert a.get(("oil", None, 0)) is None
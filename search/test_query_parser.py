@@ -0,0 +1,59 @@
+from query_parser import QueryGrammar, QueryPlan, parse_query, parse_conditions
+from keyword_automaton import compile_keywords
+from token_normalizer import TokenNormalizer
+
+clauses = [(("with",), "condition"), (("led", "by"), "leadership"), (("in",), "location"), (("rank", "by"), "ranking")]
+keywords, _, _ = compile_keywords({name: name for name in ("pe", "debt ratio", "risk", "revenue", "market cap", "price",
+                                                           "purchase percentage")}, TokenNormalizer(frozenset()))
+
+def plan(Q, grammar=None):
+    grammar = grammar or QueryGrammar(["companies"], clauses, keywords=keywords)
+    return grammar.plan(parse_query(Q, TokenNormalizer(frozenset())))
+
+def test_clauses_in_one_pass():
+    res = plan("Show me  cloud companies in california led by tim cook and jane doe with high pe")
+    assert res.text == ("cloud",)
+    assert res.location == ("california",)
+    assert res.leadership == ("tim cook", "jane doe")
+    assert res.condition == (("pe", True, None),)
+
+def test_keyword_at_the_end_is_text():
+    assert plan("tech in") == QueryPlan(text=("tech", "in"))
+    assert plan("in") == QueryPlan(text=("in",))
+    assert plan("") == QueryPlan()
+
+def test_conditions():
+    assert parse_conditions("high pe and debt ratio below 0 5".split(), keywords) == (("pe", True, None), ("debt ratio", False, 0.5))
+    assert parse_conditions("revenu higher than 10 million and low risk".split(), keywords) == (("revenu", True, 1e7), ("risk", False, None))
+    assert parse_conditions("market cap abov 1 5 billion".split(), keywords) == (("market cap", True, 1.5e9),)
+    """ the keyword may come anywhere in its condition """
+    assert parse_conditions("abov 1 5 billion market cap".split(), keywords) == (("market cap", True, 1.5e9),)
+    """ an unknown keyword or a comparison without a number is dropped """
+    assert parse_conditions("brand abov 3 and pe below".split(), keywords) == ()
+
+def test_grouped_numbers_and_scales():
+    """ commas of the raw words are thousands separators, a scale word multiplies the number """
+    assert plan("tech with market cap above 1,000").condition == (("market cap", True, 1000.0),)
+    assert plan("tech with revenue above 2,500 million").condition == (("revenu", True, 2.5e9),)
+    assert plan("tech with price below 1,000,000").condition == (("price", False, 1e6),)
+    assert plan("tech with price below 1,234.5").condition == (("price", False, 1234.5),)
+    assert plan("tech with market cap above 1.5 billion and pe below 20").condition == (("market cap", True, 1.5e9), ("pe", False, 20.0))
+    """ a comma that does not group thousands still separates words """
+    assert plan("apple, microsoft").text == ("appl", "microsoft")
+
+def test_rewrites_and_flags():
+    grammar = QueryGrammar(["buy", "best"], clauses, rewrites=(("buy percentag", "purchase percentag"),), keywords=keywords)
+    res = plan("best coins with buy percentage above 0.5", grammar)
+    assert res.text == ("coin",)
+    assert res.condition == (("purchas percentag", True, 0.5), ("growth", True, None), ("market cap", False, None))
+
+def test_plan_cache():
+    grammar = QueryGrammar([], clauses, keywords=keywords)
+    first = plan("Tech  with high PE", grammar)
+    assert plan("tech with high pe", grammar) is first
+    assert grammar.plans.stats()["hits"] == 1
+
+def test_ranking():
+    assert plan("oil companies ranked by market cap").ranking == ("market cap", True)
+    assert plan("oil companies ranked by price ascending").ranking == ("price", False)
+    assert plan("oil companies ranked by price ascending").text == ("oil",)
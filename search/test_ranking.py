@@ -0,0 +1,22 @@
+import numpy as np
+from ranking import top_k, ranked_page
+
+def test_top_k_matches_stable_sort():
+    rng = np.random.default_rng(0)
+    key = rng.integers(0, 5, size=60).astype(np.float32)
+    candidates = rng.permutation(60)[:40]
+    full = candidates[np.argsort(-key[candidates], kind="stable")]
+    for k in (0, 1, 7, 13, 40, 100):
+        assert top_k(candidates, key, k).tolist() == full[:k].tolist()
+    assert top_k(candidates, key).tolist() == full.tolist()
+
+def test_ranked_page_keeps_first_of_each_group():
+    key = np.array([5.0, 4.0, 4.0, 3.0, 2.0, 1.0])
+    group = np.array([0, 1, 0, 2, 1, 3])
+    candidates = np.arange(6)
+    page, total = ranked_page(candidates, key, group)
+    assert page.tolist() == [0, 1, 3, 5] and total == 4
+    """ the duplicates of group 0 and 1 must not shorten the second page """
+    page, total = ranked_page(candidates, key, group, offset=2, limit=2)
+    assert page.tolist() == [3, 5] and total == 4
+    assert ranked_page(candidates, key, group, offset=4, limit=2)[0].tolist() == []
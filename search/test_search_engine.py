@@ -0,0 +1,43 @@
+import io
+import contextlib
+import pytest
+from illumenti_search import IllumentiSearch
+
+rows = [("MOMO", "Hello Group", "social media and dating apps"),
+        ("ATTO", "Atento", "customer relationship outsourcing services"),
+        ("LNDC", "Landec", "biscuits and crackers that companies make"),
+        ("WISH", "ContextLogic", "wish mobile shopping platform"),
+        ("CHAT", "Chat Corp", "chat software")]
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("data")
+    paths = []
+    for exchange, part in (("nasdaq", rows[:3]), ("nyse", rows[3:])):
+        path = data_dir / f"{exchange}.csv"
+        path.write_text(",Symbol,Name,description__profile,ceo__profile,industry__profile,mktCap__profile\n" +
+                        "".join(f"{i},{s},{n},{d},,,{1e9 * (i + 1)}\n" for i, (s, n, d) in enumerate(part)))
+        paths.append(str(path))
+    search = IllumentiSearch()
+    with contextlib.redirect_stdout(io.StringIO()):
+        search.load_dataset(*paths)
+        search.build_index()
+    return search
+
+def query(search, Q, correct_spelling):
+    search.correct_spelling = correct_spelling
+    search.query_cache.invalidate(object())
+    search.grammar.plans.invalidate(object())
+    try:
+        return search.query_page(Q, limit=20)
+    finally:
+        search.correct_spelling = True
+
+@pytest.mark.parametrize("Q", ["biscuits that companies make", "with", "that have this", "from"])
+def test_stop_words_are_not_corrected(engine, Q):
+    """ "with" -> "wish", "that" -> "chat" would add unrelated matches """
+    assert query(engine, Q, True) == query(engine, Q, False)
+
+def test_misspelled_terms_are_corrected(engine):
+    assert list(query(engine, "biscuts", True)[0]) == ["LNDC"]
+    assert query(engine, "biscuts", False)[1] == 0
@@ -0,0 +1,39 @@
+import numpy as np
+from spell_index import SpellIndex, deletes, edit_distance
+
+terms = ["ethereum", "bitcoin", "bitcoincash", "solana", "compani", "comput", "apt", "semiconductor"]
+counts = [300, 500, 20, 90, 1200, 400, 5, 60]
+
+def test_deletes_and_edit_distance():
+    assert deletes("abc", 1) == {"abc", "bc", "ac", "ab"}
+    assert "c" in deletes("abc", 2)
+    assert edit_distance("etherium", "ethereum", 2) == 1
+    assert edit_distance("bitcion", "bitcoin", 2) == 1
+    assert edit_distance("solnaa", "solana", 2) == 1
+    assert edit_distance("sulanx", "solana", 2) == 2
+    assert edit_distance("compani", "bitcoin", 1) == 2
+
+def test_corrections():
+    index = SpellIndex.build(terms, counts)
+    assert index.correct("etherium") == "ethereum"
+    assert index.correct("bitcon") == "bitcoin"
+    assert index.correct("comani") == "compani"
+    """ distance 2 from eight characters on """
+    assert index.correct("semicondcutr") == "semiconductor"
+    assert index.correct("solnaa") == "solana"
+    assert index.correct("sulanx") is None
+    """ short terms are left alone """
+    assert index.correct("apx") is None
+    assert index.correct("zzzzzzz") is None
+
+def test_closest_then_most_frequent():
+    index = SpellIndex.build(terms, counts)
+    assert index.candidates("compan") == [(1, 4)]
+    index = SpellIndex.build(["cart", "card", "care"], [1, 7, 3])
+    assert [t for _, t in index.candidates("carx")] == [1, 2, 0]
+
+def test_from_arrays_round_trip():
+    index = SpellIndex.build(terms, counts)
+    arrays = index.to_arrays()
+    restored = SpellIndex.from_arrays(terms, np.asarray(counts), arrays["hashes"], arrays["term_ids"])
+    assert restored.correct("etherium") == "ethereum"
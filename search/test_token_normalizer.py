@@ -0,0 +1,15 @@
+import nltk
+from token_normalizer import TokenNormalizer, shared_normalizer
+
+def test_memoized_stems_match_porter():
+    stemmer = nltk.stem.PorterStemmer()
+    normalizer = TokenNormalizer({stemmer.stem("the")}, maxsize=4)
+    words = ["Companies", "running", "THE", "companies", "Companies"]
+    assert [normalizer.stem(w) for w in words] == [stemmer.stem(w.lower()) for w in words]
+    assert normalizer.normalize("The") == ("the", True)
+    stats = normalizer.stats()
+    assert stats["hits"] == 1 and stats["size"] <= 4
+
+def test_engines_share_one_normalizer():
+    assert shared_normalizer({"a", "b"}) is shared_normalizer({"b", "a"})
+    assert shared_normalizer({"a"}) is not shared_normalizer({"b"})
@@ -0,0 +1,26 @@
+from query_parser import QueryPlan
+from token_postings import TokenPostings, clause_docs
+
+docs = [["cupertino", "california", "iphon"], ["redmond", "washington"], ["california", "california", "santa", "clara"], []]
+
+def test_build_and_lookup():
+    postings = TokenPostings.build(docs)
+    assert postings.terms == sorted(postings.terms) and len(postings) == 7
+    """ every doc once per token, ascending """
+    assert postings.docs("california").tolist() == [0, 2]
+    assert postings.docs("texas").tolist() == []
+    assert postings.docs_with_all(["santa", "california"]).tolist() == [2]
+    assert postings.docs_with_all(["redmond", "california"]).tolist() == []
+    copy = TokenPostings.from_arrays(postings.terms, **postings.to_arrays())
+    assert copy.docs("washington").tolist() == [1]
+
+def test_clause_docs():
+    postings = {"description": TokenPostings.build(docs), "ceo": TokenPostings.build([["tim", "cook"], ["satya", "nadella"], ["lisa", "su"], []])}
+    fields = {"location": "description", "leadership": "ceo"}
+    assert clause_docs(postings, fields, QueryPlan(text=("tech",))) is None
+    assert clause_docs(postings, fields, QueryPlan(location=("california",))).tolist() == [0, 2]
+    """ every word of a leader's name, and both clauses """
+    assert clause_docs(postings, fields, QueryPlan(leadership=("satya nadella",))).tolist() == [1]
+    assert clause_docs(postings, fields, QueryPlan(location=("california",), leadership=("lisa su",))).tolist() == [2]
+    """ a clause without a field in the engine matches nothing """
+    assert len(clause_docs(postings, {"location": "description"}, QueryPlan(leadership=("tim",)))) == 0
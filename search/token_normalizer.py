@@ -0,0 +1,59 @@
+"""
+memoized token normalization (lower case, Porter stem, stop word check) shared by both engines
+
+descriptions repeat a small vocabulary, so the same words are stemmed over and over during
+tokenize_all_words and query parsing; the memo is a bounded lru cache keyed by the raw token
+"""
+import threading
+from functools import lru_cache
+import nltk
+from nltk.tokenize import RegexpTokenizer
+
+
+class TokenNormalizer:
+    def __init__(self, stop_stems, maxsize=1 << 18):
+        self.tokenizer = RegexpTokenizer(r'\w+')
+        self.stemmer = nltk.stem.PorterStemmer()
+        self.stop_stems = frozenset(stop_stems)
+        self.maxsize = maxsize
+        self.normalize = lru_cache(maxsize=maxsize)(self._normalize)
+
+    def _normalize(self, token):
+        """ (stem, is stop word) of a raw token """
+        stem = self.stemmer.stem(token.lower())
+        return stem, stem in self.stop_stems
+
+    def stem(self, token):
+        return self.normalize(token)[0]
+
+    def tokenize(self, string, with_rm_stopwords=True):
+        """ alphanumeric tokens, lower cased and stemmed, stop words removed unless with_rm_stopwords is False """
+        normalized = [self.normalize(t) for t in self.tokenizer.tokenize(str(string))]
+        if with_rm_stopwords:
+            return [t for t, is_sw in normalized if not is_sw]
+        return [t for t, is_sw in normalized]
+
+    def stats(self):
+        info = self.normalize.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+            "hits": info.hits,
+            "misses": info.misses,
+            "hit_rate": info.hits / lookups if lookups else 0.0,
+            }
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_normalizer(stop_stems):
+    """ one normalizer per stop word set, so the equity and crypto engines share their memo """
+    key = frozenset(stop_stems)
+    with _shared_lock:
+        normalizer = _shared.get(key)
+        if normalizer is None:
+            normalizer = _shared[key] = TokenNormalizer(key)
+        return normalizer
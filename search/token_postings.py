@@ -0,0 +1,92 @@
+import bisect
+import numpy as np
+
+""" query clauses answered from the filter postings, see clause_docs """
+FILTER_CLAUSES = ("location", "leadership")
+
+
+class TokenPostings:
+    """ token -> ids of the documents whose field holds the token, for the "in <location>" and
+        "led by <name>" filters
+
+        CSR layout like the inverted index: terms sorted, the docs of terms[t] are
+        doc_ids[offsets[t]:offsets[t + 1]] (int32, ascending, each doc once). a token is a binary
+        search over terms, a clause the intersection of its tokens' doc ids
+    """
+    def __init__(self):
+        self.terms = []
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.doc_ids = np.zeros(0, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.terms)
+
+    @classmethod
+    def build(cls, docs_tokens):
+        """ docs_tokens: the field's token list of every document, in doc id order """
+        vocab = {}
+        term_ids, doc_ids = [], []
+        for d, tokens in enumerate(docs_tokens):
+            for token in dict.fromkeys(tokens):
+                term_ids.append(vocab.setdefault(token, len(vocab)))
+                doc_ids.append(d)
+        postings = cls()
+        postings.terms = sorted(vocab)
+        """ renumber the terms in sorted order, a stable sort keeps every term's docs ascending """
+        sorted_ids = np.zeros(len(vocab), dtype=np.int64)
+        sorted_ids[[vocab[term] for term in postings.terms]] = np.arange(len(vocab))
+        term_ids = sorted_ids[np.asarray(term_ids, dtype=np.int64)]
+        order = np.argsort(term_ids, kind="stable")
+        postings.doc_ids = np.asarray(doc_ids, dtype=np.int32)[order]
+        postings.offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=postings.offsets[1:])
+        return postings
+
+    @classmethod
+    def from_arrays(cls, terms, offsets, doc_ids):
+        """ wrap the arrays of a snapshot """
+        postings = cls()
+        postings.terms = list(terms)
+        postings.offsets = offsets
+        postings.doc_ids = doc_ids
+        return postings
+
+    def to_arrays(self):
+        return {"offsets": self.offsets, "doc_ids": self.doc_ids}
+
+    def docs(self, token):
+        """ ascending ids of the documents holding token """
+        t = bisect.bisect_left(self.terms, token)
+        if t == len(self.terms) or self.terms[t] != token:
+            return np.zeros(0, dtype=np.int32)
+        return self.doc_ids[self.offsets[t]:self.offsets[t + 1]]
+
+    def docs_with_all(self, tokens):
+        """ ascending ids of the documents holding every token, rarest token first """
+        postings = sorted((self.docs(token) for token in tokens), key=len)
+        res = np.asarray(postings[0], dtype=np.int64)
+        for docs in postings[1:]:
+            if len(res) == 0:
+                break
+            res = np.intersect1d(res, docs, assume_unique=True)
+        return res
+
+
+def clause_docs(filter_postings, clause_fields, plan):
+    """ ascending ids of the documents matching the plan's location and leadership clauses, None
+        when it has neither. every token of a clause (each word of a leader's name) has to be in
+        the clause's field; a clause the engine has no field for matches nothing
+
+        filter_postings: field -> TokenPostings, clause_fields: clause -> field
+    """
+    res = None
+    for clause in FILTER_CLAUSES:
+        tokens = [token for value in getattr(plan, clause) for token in value.split()]
+        if not tokens:
+            continue
+        field = clause_fields.get(clause)
+        if field is None:
+            return np.zeros(0, dtype=np.int64)
+        docs = filter_postings[field].docs_with_all(tokens)
+        res = docs if res is None else np.intersect1d(res, docs, assume_unique=True)
+    return res
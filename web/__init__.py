@@ -5,7 +5,7 @@ import nltk
 from nltk.corpus import stopwords
 from .logging_config import logger
 from .config import get_config
-from .extensions import iSearch, iCryptoSearch, init_search_indexes
+from .extensions import iSearch, iCryptoSearch, init_search_indexes, start_search_reload_watcher
 from .middleware import init_cors, init_error_handlers
 from .routes import register_blueprints
 
@@ -45,6 +45,9 @@ def create_app(config_name=None):
     
     # Initialize search indexes
     init_search_indexes()
+    # Threads don't survive fork: with preload_app gunicorn starts the watcher in each worker instead
+    if not app.config.get('SEARCH_PRELOAD'):
+        start_search_reload_watcher()
     
     logger.info("Flask application created and configured successfully")
     
@@ -14,6 +14,8 @@ load_dotenv(dotenv_path=dotenv_path)
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY', 'wearetherebels')
+    # Search pages are ticker -> fields objects in rank order, jsonify must not sort their keys
+    JSON_SORT_KEYS = False
     
     # AWS Configuration
     AWS_REGION = os.environ.get('AWS_REGION')
@@ -43,6 +45,33 @@ class Config:
     NASDAQ_FILE = os.path.join(DATA_PATH, 'equity_nasdaq_exported_table.csv')
     CRYPTO_FILE = os.path.join(DATA_PATH, 'crypto_info_table_full.csv')
     
+    # Search index snapshots (built offline by search/compile_index.py)
+    SEARCH_INDEX_DIR = os.environ.get('SEARCH_INDEX_DIR', os.path.join(DATA_PATH, 'index'))
+    EQUITY_INDEX_SNAPSHOT = os.path.join(SEARCH_INDEX_DIR, 'equity')
+    CRYPTO_INDEX_SNAPSHOT = os.path.join(SEARCH_INDEX_DIR, 'crypto')
+    # Build the search indexes once in the gunicorn master (preload_app) and share them with the workers
+    SEARCH_PRELOAD = os.environ.get('SEARCH_PRELOAD', '0') == '1'
+    # Search pagination: results per page when no limit is given (unset: all results) and the largest page served
+    SEARCH_DEFAULT_LIMIT = int(os.environ['SEARCH_DEFAULT_LIMIT']) if os.environ.get('SEARCH_DEFAULT_LIMIT') else None
+    SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', '500'))
+    # Ranking of text matches when a request does not pick one: 'tfidf' or 'bm25'
+    SEARCH_SCORING = os.environ.get('SEARCH_SCORING', 'tfidf')
+    # Typeahead (/api/search/suggest): completions returned by default and at most
+    SEARCH_SUGGEST_LIMIT = int(os.environ.get('SEARCH_SUGGEST_LIMIT', '8'))
+    SEARCH_SUGGEST_MAX_LIMIT = int(os.environ.get('SEARCH_SUGGEST_MAX_LIMIT', '50'))
+    # Unified search (/api/search): threads querying the engines concurrently, latency budget for all of them (ms)
+    SEARCH_FANOUT_WORKERS = int(os.environ.get('SEARCH_FANOUT_WORKERS', '4'))
+    SEARCH_LATENCY_BUDGET_MS = float(os.environ.get('SEARCH_LATENCY_BUDGET_MS', '1000'))
+    # Search result cache: LRU entries and TTL (seconds) per worker, optional directory shared by all workers
+    SEARCH_CACHE_SIZE = int(os.environ.get('SEARCH_CACHE_SIZE', '1024'))
+    SEARCH_CACHE_TTL = float(os.environ.get('SEARCH_CACHE_TTL', '300'))
+    SEARCH_SHARED_CACHE_DIR = os.environ.get('SEARCH_SHARED_CACHE_DIR') or None
+    # Search hot reload: poll the dataset files every N seconds (0: off), token for POST /api/search/reload (unset: off)
+    SEARCH_RELOAD_INTERVAL = float(os.environ.get('SEARCH_RELOAD_INTERVAL', '0'))
+    SEARCH_ADMIN_TOKEN = os.environ.get('SEARCH_ADMIN_TOKEN') or None
+    # Processes used when an index has to be built in-process (1: serial, 0: one per cpu)
+    SEARCH_BUILD_WORKERS = int(os.environ.get('SEARCH_BUILD_WORKERS', '1'))
+    
     # Application Settings
     DEBUG = True
     HOST = '0.0.0.0'
@@ -2,16 +2,77 @@
 Shared extensions and global objects for the Flask application.
 This module initializes objects that need to be shared across the application.
 """
+import gc
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import boto3
 from botocore.exceptions import ClientError
 from .logging_config import logger
 from .config import Config
 from search.illumenti_search import IllumentiSearch
 from search.illumenti_crypto_search import IllumentiCryptoSearch
+from search.index_snapshot import SnapshotError, source_fingerprint
+from search.query_cache import QueryCache, dataset_version
+from search.dataset_loader import search_source
+
+
+class SearchEngineHandle:
+    """
+    Stable reference to the live engine of one search index.
+    Modules import the handle once; a reload builds a complete new engine off the
+    request path and swaps it in with a single reference assignment, so a query
+    always runs against either the old or the new engine, never a half-built one.
+    """
+
+    def __init__(self, name, engine_class, datasets, snapshot_path):
+        self.name = name
+        self.engine_class = engine_class
+        self.datasets = datasets
+        self.snapshot_path = snapshot_path
+        self.engine = engine_class()
+
+    def __getattr__(self, attr):
+        return getattr(self.engine, attr)
+
+    @property
+    def sources(self):
+        """Files to load, resolved on every call: the .npz search artifact of a dataset when it is
+        up to date with the CSV, else the CSV (see search_source)."""
+        return [search_source(path) for path in self.datasets]
+
+    def swap(self, engine):
+        """Atomically replace the live engine, returns the previous one."""
+        old_engine, self.engine = self.engine, engine
+        return old_engine
+
+    def current_version(self):
+        """Dataset version of the source files on disk, None while they can't be read."""
+        try:
+            return dataset_version(source_fingerprint(self.sources))
+        except OSError:
+            return None
+
+
+def make_query_cache(engine_name):
+    """Result cache for one search engine, configured from Config."""
+    shared_dir = None
+    if Config.SEARCH_SHARED_CACHE_DIR:
+        shared_dir = os.path.join(Config.SEARCH_SHARED_CACHE_DIR, engine_name)
+    return QueryCache(maxsize=Config.SEARCH_CACHE_SIZE, ttl=Config.SEARCH_CACHE_TTL, shared_dir=shared_dir)
+
 
 # Initialize search objects (shared across application)
-iSearch = IllumentiSearch()
-iCryptoSearch = IllumentiCryptoSearch()
+# The pipeline's .npz search artifacts are read instead of the CSVs while they are up to date
+iSearch = SearchEngineHandle('equity', IllumentiSearch, [Config.NYSE_FILE, Config.NASDAQ_FILE],
+                             Config.EQUITY_INDEX_SNAPSHOT)
+iCryptoSearch = SearchEngineHandle('crypto', IllumentiCryptoSearch, [Config.CRYPTO_FILE],
+                                   Config.CRYPTO_INDEX_SNAPSHOT)
+search_handles = (iSearch, iCryptoSearch)
+# Threads of the unified search fan-out, started on first use (in the worker, not the preloading master)
+search_executor = ThreadPoolExecutor(max_workers=Config.SEARCH_FANOUT_WORKERS, thread_name_prefix='search-fanout')
+_reload_lock = threading.Lock()
 
 # Initialize DynamoDB connection
 try:
@@ -28,22 +89,109 @@ except Exception as e:
     equity_table = None
 
 
-def init_search_indexes():
-    """Initialize search indexes with data"""
-    try:
-        # Load equity datasets
-        logger.info("Loading equity datasets: NYSE (%s), NASDAQ (%s)", Config.NYSE_FILE, Config.NASDAQ_FILE)
-        iSearch.load_dataset(Config.NYSE_FILE, Config.NASDAQ_FILE)
-        iSearch.build_index()
-        logger.info("Equity datasets loaded and indexed successfully.")
-    except Exception as e:
-        logger.error("Failed to load or index equity datasets: %s", e, exc_info=True)
-
-    # Load crypto dataset
+def load_search_engine(handle, previous=None):
+    """
+    Build a new, ready to query engine for a handle.
+    Memory-maps the prebuilt snapshot when it is up to date with the datasets,
+    otherwise falls back to loading the CSVs and building the index in-process;
+    rows whose text is unchanged since `previous` (the live engine) reuse its tokens.
+    """
+    engine = handle.engine_class()
+    engine.query_cache = make_query_cache(handle.name)
+    engine.scoring = Config.SEARCH_SCORING
+    sources = handle.sources
     try:
-        logger.info("Loading crypto dataset: %s", Config.CRYPTO_FILE)
-        iCryptoSearch.load_dataset(Config.CRYPTO_FILE)
-        iCryptoSearch.build_index()
-        logger.info("Crypto dataset loaded and indexed successfully.")
-    except Exception as e:
-        logger.error("Failed to load or index crypto dataset: %s", e, exc_info=True)
+        engine.load_snapshot(handle.snapshot_path, sources=sources)
+        logger.info("%s search index loaded from snapshot %s", handle.name, handle.snapshot_path)
+    except (SnapshotError, OSError) as e:
+        logger.info("%s snapshot unavailable (%s), building index from CSVs", handle.name, e)
+        logger.info("Loading %s datasets: %s", handle.name, sources)
+        engine.load_dataset(*sources)
+        engine.build_index(previous=previous, workers=Config.SEARCH_BUILD_WORKERS)
+        logger.info("%s datasets loaded and indexed successfully.", handle.name)
+    return engine
+
+
+def init_search_indexes():
+    """
+    Initialize search indexes with data.
+    """
+    for handle in search_handles:
+        try:
+            handle.swap(load_search_engine(handle))
+        except Exception as e:
+            logger.error("Failed to load or index %s datasets: %s", handle.name, e, exc_info=True)
+
+    if Config.SEARCH_PRELOAD:
+        share_search_indexes()
+
+
+def reload_search_indexes(force=False):
+    """
+    Rebuild the engines whose datasets changed on disk (all of them with force) and
+    swap them in. Queries keep being served by the old engines meanwhile; if a build
+    fails the old engine stays live. Returns the names of the reloaded engines.
+    """
+    reloaded = []
+    with _reload_lock:
+        for handle in search_handles:
+            if not force and handle.current_version() in (None, handle.engine.dataset_version):
+                continue
+            try:
+                engine = load_search_engine(handle, previous=handle.engine)
+            except Exception as e:
+                logger.error("Reloading the %s search index failed, keeping the current one: %s",
+                             handle.name, e, exc_info=True)
+                continue
+            handle.swap(engine)
+            reloaded.append(handle.name)
+            logger.info("%s search index reloaded (dataset version %s)", handle.name, engine.dataset_version)
+    return reloaded
+
+
+def start_search_reload_watcher(interval=None):
+    """
+    Poll the dataset files every `interval` seconds (SEARCH_RELOAD_INTERVAL, 0 disables)
+    from a daemon thread and reload the engines whose files changed. A change is only
+    acted on once the files are unchanged across two polls, so a copy in progress is
+    never indexed.
+    """
+    interval = Config.SEARCH_RELOAD_INTERVAL if interval is None else interval
+    if interval <= 0:
+        return None
+
+    def watch():
+        seen = {}
+        while True:
+            time.sleep(interval)
+            try:
+                versions = {handle.name: handle.current_version() for handle in search_handles}
+                stable = any(
+                    versions[handle.name] not in (None, handle.engine.dataset_version)
+                    and versions[handle.name] == seen.get(handle.name)
+                    for handle in search_handles)
+                seen = versions
+                if stable:
+                    reload_search_indexes()
+            except Exception as e:
+                logger.error("Search reload watcher error: %s", e, exc_info=True)
+
+    thread = threading.Thread(target=watch, name='search-reload-watcher', daemon=True)
+    thread.start()
+    logger.info("Watching search datasets for changes every %ss", interval)
+    return thread
+
+
+def share_search_indexes():
+    """
+    Prepare the search indexes to be inherited by forked gunicorn workers.
+    Drops the columns the query path never reads and moves every surviving object
+    into the permanent GC generation, so collections in the workers don't write to
+    (and unshare) the pages built in the master.
+    """
+    for handle in search_handles:
+        if handle.dataset is not None:
+            handle.compact()
+    gc.collect()
+    gc.freeze()
+    logger.info("Search indexes compacted and frozen for sharing across workers")
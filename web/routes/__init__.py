@@ -8,6 +8,7 @@ from .equity import equity_bp
 from .crypto import crypto_bp
 from .data import data_bp
 from .health import health_bp
+from .search import search_bp
 
 
 def register_blueprints(app: Flask):
@@ -22,6 +23,7 @@ def register_blueprints(app: Flask):
     app.register_blueprint(crypto_bp)
     app.register_blueprint(data_bp)
     app.register_blueprint(health_bp)
+    app.register_blueprint(search_bp)
 
 
 __all__ = [
@@ -31,4 +33,5 @@ __all__ = [
     'crypto_bp',
     'data_bp',
     'health_bp',
+    'search_bp',
 ]
@@ -5,6 +5,7 @@ Handles equity search endpoints.
 from flask import Blueprint, request, jsonify
 from ..logging_config import logger
 from ..extensions import iSearch
+from ..utils.pagination import parse_page_args, parse_scoring_arg
 
 equity_bp = Blueprint('equity', __name__, url_prefix='/api/equity')
 
@@ -16,9 +17,13 @@ def search_equity():
     
     Query Parameters:
         query (str): Search query string
+        limit (int, optional): Number of results to return
+        offset (int, optional): Number of ranked results to skip
+        scoring (str, optional): 'tfidf' or 'bm25', defaults to SEARCH_SCORING
         
     Returns:
-        JSON response with search results
+        JSON response with one page of search results,
+        the X-Total-Count header holds the total number of matches
     """
     query = request.args.get('query', '')
     
@@ -26,7 +31,16 @@ def search_equity():
         logger.warning("Empty query provided to /api/equity/search")
         return jsonify({"error": "Query parameter is required"}), 400
     
-    logger.info("Equity Query: %s", query)
-    search_res = iSearch.query(query)
+    try:
+        limit, offset = parse_page_args(request.args)
+        scoring = parse_scoring_arg(request.args)
+    except ValueError as e:
+        logger.warning("Bad search arguments to /api/equity/search: %s", e)
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify(search_res), 200
+    logger.info("Equity Query: %s (limit=%s, offset=%s, scoring=%s)", query, limit, offset, scoring)
+    search_res, total = iSearch.query_page(query, limit=limit, offset=offset, scoring=scoring)
+    
+    response = jsonify(search_res)
+    response.headers['X-Total-Count'] = str(total)
+    return response, 200
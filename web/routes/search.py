@@ -0,0 +1,151 @@
+"""
+Search API Blueprint
+Handles the unified equity + crypto search, typeahead suggestions and
+search engine diagnostics and maintenance endpoints.
+"""
+import os
+import hmac
+import threading
+from flask import Blueprint, request, jsonify
+from ..logging_config import logger
+from ..config import Config
+from ..extensions import iSearch, iCryptoSearch, search_handles, search_executor, reload_search_indexes
+from ..utils.memory import process_memory
+from ..utils.pagination import parse_page_args, parse_scoring_arg
+from search.multi_search import search_all
+
+search_bp = Blueprint('search', __name__, url_prefix='/api/search')
+
+
+@search_bp.route('', methods=['GET', 'POST'])
+def search():
+    """
+    Search equities and cryptocurrencies at once.
+    Both engines run concurrently on one parse of the query; their results are merged
+    into one ranking by text score normalized by the query's score bound in each engine
+    (1 = a document made of the query terms alone).
+    
+    Query Parameters:
+        query (str): Search query string
+        limit (int, optional): Number of results to return
+        offset (int, optional): Number of ranked results to skip
+        scoring (str, optional): 'tfidf' or 'bm25', defaults to SEARCH_SCORING
+        type (str, optional): 'equity', 'crypto' or 'all' (default)
+        
+    Returns:
+        JSON object with the page of results ({symbol, type, score, ...}), the total
+        number of matches and the engines that missed SEARCH_LATENCY_BUDGET_MS or failed;
+        the X-Total-Count header holds the total as well
+    """
+    query = request.args.get('query', '')
+    if not query:
+        logger.warning("Empty query provided to /api/search")
+        return jsonify({"error": "Query parameter is required"}), 400
+    
+    kind = request.args.get('type', 'all')
+    if kind not in ('all', 'equity', 'crypto'):
+        return jsonify({"error": "type must be one of all, equity, crypto"}), 400
+    try:
+        limit, offset = parse_page_args(request.args)
+        scoring = parse_scoring_arg(request.args)
+    except ValueError as e:
+        logger.warning("Bad search arguments to /api/search: %s", e)
+        return jsonify({"error": str(e)}), 400
+    
+    logger.info("Unified Query: %s (type=%s, limit=%s, offset=%s, scoring=%s)", query, kind, limit, offset, scoring)
+    engines = {handle.name: handle.engine for handle in search_handles if kind in ('all', handle.name)}
+    results, total, timed_out, failed = search_all(
+        engines, query, search_executor, limit=limit, offset=offset, scoring=scoring,
+        budget=Config.SEARCH_LATENCY_BUDGET_MS / 1000.0)
+    if timed_out or failed:
+        logger.warning("Unified search %r incomplete, timed out: %s, failed: %s", query, timed_out, failed)
+    
+    response = jsonify({"results": results, "total": total, "timed_out": timed_out, "failed": failed})
+    response.headers['X-Total-Count'] = str(total)
+    return response, 200
+
+
+@search_bp.route('/suggest', methods=['GET'])
+def suggest():
+    """
+    Typeahead completions over equity and crypto symbols and names.
+    
+    Query Parameters:
+        q (str): What was typed so far, matched against the start of the symbol
+                 or of any word of the name
+        limit (int, optional): Number of completions, defaults to SEARCH_SUGGEST_LIMIT
+        type (str, optional): 'equity', 'crypto' or 'all' (default)
+        
+    Returns:
+        JSON list of {symbol, name, type, market_cap}: symbol and whole-name matches
+        first, each group largest market cap first
+    """
+    prefix = request.args.get('q', '')
+    limit = request.args.get('limit', type=int)
+    kind = request.args.get('type', 'all')
+    if 'limit' in request.args and (limit is None or limit < 0):
+        return jsonify({"error": "limit must be an integer >= 0"}), 400
+    if limit is None:
+        limit = Config.SEARCH_SUGGEST_LIMIT
+    if kind not in ('all', 'equity', 'crypto'):
+        return jsonify({"error": "type must be one of all, equity, crypto"}), 400
+    limit = min(limit, Config.SEARCH_SUGGEST_MAX_LIMIT)
+    
+    res = []
+    for handle in search_handles:
+        if kind in ('all', handle.name):
+            res.extend(dict(item, type=handle.name) for item in handle.suggest(prefix, limit))
+    # Same order as each engine's prefix index: symbol and whole-name matches first, then by market cap
+    res.sort(key=lambda item: (not item["lead"],
+                               -item["market_cap"] if item["market_cap"] is not None else float('inf')))
+    return jsonify([{k: v for k, v in item.items() if k != "lead"} for item in res[:limit]]), 200
+
+
+@search_bp.route('/stats', methods=['GET'])
+def search_stats():
+    """
+    Search engine statistics of the worker serving the request.
+    
+    Returns:
+        JSON response with the worker pid, preload mode, index sizes,
+        query cache, query plan cache and stem memo counters and the worker's memory usage (kB)
+    """
+    return jsonify({
+        "pid": os.getpid(),
+        "preload": Config.SEARCH_PRELOAD,
+        "equity": {"rows": iSearch.index.n_docs, "terms": len(iSearch.index)},
+        "crypto": {"rows": iCryptoSearch.index.n_docs, "terms": len(iCryptoSearch.index)},
+        "cache": {"equity": iSearch.query_cache.stats(), "crypto": iCryptoSearch.query_cache.stats()},
+        "plan_cache": {"equity": iSearch.grammar.plans.stats(), "crypto": iCryptoSearch.grammar.plans.stats()},
+        "versions": {"equity": iSearch.dataset_version, "crypto": iCryptoSearch.dataset_version},
+        "stem_cache": iSearch.normalizer.stats(),
+        "memory": process_memory(),
+    }), 200
+
+
+@search_bp.route('/reload', methods=['POST'])
+def reload_search():
+    """
+    Rebuild the search indexes of the worker serving the request in the background
+    and swap them in; queries keep being answered by the current indexes meanwhile.
+    Other workers pick up dataset changes through their reload watcher.
+    
+    Headers:
+        X-Admin-Token (str): Must match SEARCH_ADMIN_TOKEN
+        
+    Query Parameters:
+        force (str, optional): '1' reloads even if the datasets did not change
+        
+    Returns:
+        202 once the reload is started, 403 without a valid token
+    """
+    token = request.headers.get('X-Admin-Token', '')
+    if not Config.SEARCH_ADMIN_TOKEN or not hmac.compare_digest(token, Config.SEARCH_ADMIN_TOKEN):
+        logger.warning("Rejected search reload request")
+        return jsonify({"error": "Forbidden"}), 403
+    
+    force = request.args.get('force', '0') == '1'
+    logger.info("Search reload requested (force=%s)", force)
+    threading.Thread(target=reload_search_indexes, kwargs={'force': force},
+                     name='search-reload', daemon=True).start()
+    return jsonify({"status": "reloading", "pid": os.getpid(), "force": force}), 202
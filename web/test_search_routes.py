@@ -0,0 +1,66 @@
+import os
+os.environ.setdefault('AWS_REGION', 'us-west-2')
+import pytest
+import web
+from web import create_app
+from web.extensions import iSearch, iCryptoSearch, SearchEngineHandle
+
+
+class FakeEngine:
+    """ returns a fixed page, keys in rank order and not in alphabetical order """
+    def __init__(self, page=None, completions=()):
+        self.page = page
+        self.completions = list(completions)
+
+    def query_page(self, Q, limit=None, offset=0, scoring=None):
+        return self.page, len(self.page)
+
+    def suggest(self, prefix, limit=10):
+        return self.completions[:limit]
+
+
+def completion(symbol, market_cap, lead):
+    return {"symbol": symbol, "name": symbol.title(), "market_cap": market_cap, "lead": lead}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(web, "init_search_indexes", lambda: None)
+    monkeypatch.setattr(web, "start_search_reload_watcher", lambda: None)
+    old = iSearch.swap(FakeEngine({"MSFT": {"price": "1"}, "AAPL": {"price": "2"}, "NVDA": {"price": "3"}},
+                                  [completion("MSFT", 3e12, True), completion("BIGMS", 5e12, False)]))
+    old_crypto = iCryptoSearch.swap(FakeEngine({"BTC": {}, "ETH": {}, "ADA": {}}, [completion("MSX", None, True)]))
+    yield create_app("testing").test_client()
+    iSearch.swap(old)
+    iCryptoSearch.swap(old_crypto)
+
+
+def test_search_pages_keep_rank_order(client):
+    res = client.get("/api/equity/search?query=tech")
+    assert res.status_code == 200 and res.headers["X-Total-Count"] == "3"
+    assert list(res.get_json()) == ["MSFT", "AAPL", "NVDA"]
+    """ crypto's default market cap order """
+    assert list(client.get("/api/crypto/search?query=coins").get_json()) == ["BTC", "ETH", "ADA"]
+
+
+
+def test_suggest_keeps_symbol_matches_first(client):
+    """ a bigger company matching on a later word of its name comes after every symbol match """
+    res = client.get("/api/search/suggest?q=ms").get_json()
+    assert [item["symbol"] for item in res] == ["MSFT", "MSX", "BIGMS"]
+    assert res[0] == {"symbol": "MSFT", "name": "Msft", "market_cap": 3e12, "type": "equity"}
+    assert [item["symbol"] for item in client.get("/api/search/suggest?q=ms&limit=1").get_json()] == ["MSFT"]
+
+
+def test_handle_resolves_sources_on_every_check(tmp_path):
+    csv_path, artifact_path = tmp_path / "table.csv", tmp_path / "table.npz"
+    csv_path.write_text("Symbol\n")
+    handle = SearchEngineHandle("equity", FakeEngine, [str(csv_path)], str(tmp_path / "index"))
+    assert handle.sources == [str(csv_path)]
+    artifact_path.write_bytes(b"")
+    os.utime(artifact_path, ns=(os.stat(csv_path).st_mtime_ns + 10**9,) * 2)
+    assert handle.sources == [str(artifact_path)]
+    version = handle.current_version()
+    """ a csv refreshed without its artifact wins again, and counts as a new dataset version """
+    os.utime(csv_path, ns=(os.stat(artifact_path).st_mtime_ns + 10**9,) * 2)
+    assert handle.sources == [str(csv_path)] and handle.current_version() != version
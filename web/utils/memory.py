@@ -0,0 +1,29 @@
+import resource
+
+
+def process_memory(pid='self'):
+    """
+    Memory usage of a process in kB.
+    On Linux this reads /proc/<pid>/smaps_rollup, where `pss` splits shared pages
+    between the processes mapping them and `shared_*` counts pages still shared
+    with the gunicorn master after fork.
+    """
+    fields = {
+        'Rss': 'rss',
+        'Pss': 'pss',
+        'Shared_Clean': 'shared_clean',
+        'Shared_Dirty': 'shared_dirty',
+        'Private_Clean': 'private_clean',
+        'Private_Dirty': 'private_dirty',
+    }
+    usage = {}
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                if key in fields:
+                    usage[fields[key]] = int(value.split()[0])
+    except OSError:
+        # Non-Linux fallback: peak RSS of the current process only
+        usage['max_rss'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage
@@ -0,0 +1,42 @@
+"""
+limit/offset and scoring parsing for the paginated search endpoints.
+"""
+from typing import Optional, Tuple
+from search.inverted_index import SCORING_MODES
+from ..config import Config
+
+
+def parse_page_args(args) -> Tuple[Optional[int], int]:
+    """
+    Read limit and offset from the request arguments.
+    
+    A missing limit falls back to SEARCH_DEFAULT_LIMIT (None returns every result),
+    limits above SEARCH_MAX_LIMIT are clamped. Raises ValueError on bad values.
+    """
+    limit = args.get('limit', type=int, default=Config.SEARCH_DEFAULT_LIMIT)
+    offset = args.get('offset', type=int, default=0)
+    if 'limit' in args and limit is None or 'offset' in args and offset is None:
+        raise ValueError("limit and offset must be integers")
+    if limit is not None:
+        if limit < 0:
+            raise ValueError("limit must be >= 0")
+        limit = min(limit, Config.SEARCH_MAX_LIMIT)
+    if offset < 0:
+        raise ValueError("offset must be >= 0")
+    return limit, offset
+
+
+def parse_scoring_arg(args) -> Optional[str]:
+    """
+    Read the ranking mode ('tfidf' or 'bm25') from the request arguments.
+    
+    A missing scoring returns None, the engine's default (SEARCH_SCORING).
+    Raises ValueError on unknown modes.
+    """
+    scoring = args.get('scoring')
+    if scoring is None:
+        return None
+    scoring = scoring.lower()
+    if scoring not in SCORING_MODES:
+        raise ValueError(f"scoring must be one of {', '.join(SCORING_MODES)}")
+    return scoring
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, flash 
 from . import iSearch 
 from . import iCryptoSearch
+from .extensions import search_executor
 
 views = Blueprint('views', __name__) 
 
@@ -33,15 +34,18 @@ def search():
     # For Equity
     if 'query' in request.form:
         query = request.form.get('query')
-    if query:
-        search_res = iSearch.query(query)
     
     # For Crypto
     if 'crypto_query' in request.form:
         crypto_query = request.form.get('crypto_query')
-        
-    if crypto_query:
-        crypto_search_res = iCryptoSearch.query(crypto_query)
+    
+    # Both engines run concurrently
+    search_future = search_executor.submit(iSearch.query, query) if query else None
+    crypto_future = search_executor.submit(iCryptoSearch.query, crypto_query) if crypto_query else None
+    if search_future:
+        search_res = search_future.result()
+    if crypto_future:
+        crypto_search_res = crypto_future.result()
 
     """ render the search results """ 
     return render_template("search.html", search_results=search_res, crypto_search_res=crypto_search_res)